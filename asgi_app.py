@@ -0,0 +1,226 @@
+"""Asyncio (ASGI) serving mode for many concurrent dashboards.
+
+/news-data and /news-stream are served natively on the event loop. An
+idle SSE client is one coroutine waiting on a shared asyncio.Event rather
+than a thread blocked on a queue. Every other route (/, /status, /metrics,
+/trends, /history, /static) runs the Flask app from server.py in the
+default thread pool, so blocking work never touches the loop. Fetching and
+scoring stay on the scraper's own threads (or in collector.py when
+NEWS_SNAPSHOT_FILE is set).
+
+    python asgi_app.py                    # runs uvicorn (pip install uvicorn)
+    uvicorn asgi_app:app --port 5000
+"""
+import argparse
+import asyncio
+import io
+import sys
+import threading
+import time
+from urllib.parse import parse_qs
+
+import server
+from instrumentation import METRICS
+from snapshot_store import SSE_HEARTBEAT, news_data_response
+
+SSE_WRITE_TIMEOUT = 10  # seconds a client may stall a frame before it is dropped
+
+SSE_CONNECTIONS = METRICS.counter('async_sse_connections_total',
+                                  "/news-stream connections on the asyncio server, by event")
+
+
+class SnapshotHub:
+    """Latest SSE frame plus an event that fires when it changes.
+
+    One bridge thread takes frames from the scraper's broadcaster and
+    hands them to the loop. Clients always write the newest frame, so a
+    slow client skips versions instead of queueing them.
+    """
+    def __init__(self, broadcaster):
+        self.broadcaster = broadcaster
+        self.frame = None
+        self.version = None
+        self.clients = 0
+        self.changed = asyncio.Event()
+
+    def start(self, loop):
+        threading.Thread(target=self._bridge, args=(loop,), daemon=True,
+                         name='snapshot-hub').start()
+
+    def _bridge(self, loop):
+        subscription = self.broadcaster.subscribe()
+        while True:
+            frame = subscription.next_frame(timeout=SSE_HEARTBEAT)
+            if frame is not None:
+                loop.call_soon_threadsafe(self.publish, frame)
+
+    def publish(self, frame):
+        self.frame = frame
+        self.version = frame[4:frame.index(b'\n')].decode()  # 'id: <version>\n...'
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class NewsASGIApp:
+    """ASGI application serving the same routes as server.py"""
+    def __init__(self, flask_app, scraper):
+        self.flask_app = flask_app
+        self.scraper = scraper
+        self.hub = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        if self.hub is None:
+            self.hub = SnapshotHub(self.scraper.broadcaster)
+            self.hub.start(asyncio.get_running_loop())
+        path = scope['path']
+        if path == '/news-data' and scope['method'] == 'GET':
+            await self.news_data(scope, send)
+        elif path == '/news-stream' and scope['method'] == 'GET':
+            await self.news_stream(scope, receive, send)
+        else:
+            await self.call_flask(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def news_data(self, scope, send):
+        # Same rules as server.news_data (see snapshot_store.news_data_response)
+        started = time.perf_counter()
+        headers = _request_headers(scope)
+        snapshot = self.scraper.snapshot
+        if snapshot is None:
+            status, body = 202, b'{"error":"Initializing..."}'
+            response_headers = [(b'content-type', b'application/json')]
+        else:
+            query = parse_qs(scope['query_string'].decode('latin-1'))
+            status, body, response_headers = news_data_response(
+                snapshot, query.get('since', [None])[0], query.get('version', [None])[0],
+                headers.get('if-none-match', ''), headers.get('accept-encoding', ''))
+            response_headers = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                for name, value in response_headers]
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': response_headers + [(b'content-length', b'%d' % len(body))]})
+        await send({'type': 'http.response.body', 'body': body})
+        METRICS.histogram('http_request_seconds', "Flask handler latency").observe(
+            time.perf_counter() - started, endpoint='news_data', status=status)
+
+    async def news_stream(self, scope, receive, send):
+        hub = self.hub
+        last_sent = _request_headers(scope).get('last-event-id')
+        disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+        hub.clients += 1
+        SSE_CONNECTIONS.inc(event='opened')
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no')]})
+            while not disconnected.done():
+                if hub.frame is not None and hub.version != last_sent:
+                    chunk, last_sent = hub.frame, hub.version
+                else:
+                    changed = asyncio.ensure_future(hub.changed.wait())
+                    done, _ = await asyncio.wait({changed, disconnected}, timeout=SSE_HEARTBEAT,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                    changed.cancel()
+                    if done:
+                        continue
+                    chunk = b': keep-alive\n\n'
+                # Backpressure: a client that cannot take a frame in time is dropped
+                await asyncio.wait_for(send({'type': 'http.response.body', 'body': chunk,
+                                             'more_body': True}), SSE_WRITE_TIMEOUT)
+        except (asyncio.TimeoutError, OSError):
+            pass
+        finally:
+            disconnected.cancel()
+            hub.clients -= 1
+            SSE_CONNECTIONS.inc(event='closed')
+
+    async def call_flask(self, scope, receive, send):
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        loop = asyncio.get_running_loop()
+        status, headers, chunks = await loop.run_in_executor(
+            None, _run_wsgi, self.flask_app, scope, body)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': chunks})
+
+
+async def _wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+def _request_headers(scope):
+    return {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+
+
+def _run_wsgi(wsgi_app, scope, body):
+    """Run one buffered request through a WSGI app; returns (status, headers, body)"""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': '',
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        key = name.decode('latin-1').upper().replace('-', '_')
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = 'HTTP_' + key
+        value = value.decode('latin-1')
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                               for name, value in headers]
+
+    result = wsgi_app(environ, start_response)
+    try:
+        chunks = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return response['status'], response['headers'], chunks
+
+
+app = NewsASGIApp(server.app, server.scraper)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("The asyncio serving mode needs uvicorn: pip install uvicorn")
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
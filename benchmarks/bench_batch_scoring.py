@@ -0,0 +1,90 @@
+"""Offline benchmark of the batched headline scoring stage.
+
+Scores synthetic headlines for many cities against benchmarks/fake_openai.py
+and compares one scoring pass per city with a single cross-city pass.
+
+Usage:
+    python benchmarks/bench_batch_scoring.py --cities 12 --headlines 60 --latency 0.1
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Measure scoring itself, not the production request budget
+os.environ.setdefault('NEWS_LLM_RPM', '0')
+os.environ.setdefault('NEWS_LLM_TPM', '0')
+
+from openai import OpenAI  # noqa: E402
+
+import news_scraper  # noqa: E402
+from news_scraper import NewsItem, NewsScraperApp  # noqa: E402
+from fake_openai import FakeOpenAIServer  # noqa: E402
+
+WORDS = ['metro', 'record', 'flood', 'launch', 'traffic', 'protest', 'growth',
+         'council', 'market', 'accident', 'festival', 'rains', 'award', 'strike']
+
+
+def scoring_app(base_url):
+    """A NewsScraperApp with only the scoring state set up (no fetch, no browser)"""
+    app = NewsScraperApp.__new__(NewsScraperApp)
+    app.root = None
+    app.client = OpenAI(base_url=base_url, api_key="fake", max_retries=0)
+    app._init_sentiment()
+    app.sentiment_mode = 'llm'
+    return app
+
+
+def synthetic_items(cities, per_city):
+    city_items = {}
+    for c in range(cities):
+        city = f"City{c}"
+        city_items[city] = tuple(NewsItem(
+            f"{city} {WORDS[i % len(WORDS)]} {WORDS[(i * 7) % len(WORDS)]} update {i}",
+            "Example News",
+            1_700_000_000 + i * 60,
+            f"https://example.invalid/{city}/{i}"
+        ) for i in range(per_city))
+    return city_items
+
+
+def run(server, city_items, per_city):
+    app = scoring_app(server.base_url)
+    server.reset_stats()
+    started = time.perf_counter()
+    if per_city:
+        scored = sum(app.score_pending_items({city: items}) for city, items in city_items.items())
+    else:
+        scored = app.score_pending_items(city_items)
+    elapsed = time.perf_counter() - started
+    return scored, elapsed, server.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cities', type=int, default=12)
+    parser.add_argument('--headlines', type=int, default=60, help="per city")
+    parser.add_argument('--latency', type=float, default=0.1, help="fake LLM seconds per request")
+    parser.add_argument('--malformed-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(latency=args.latency, malformed_rate=args.malformed_rate,
+                              seed=1).start()
+    total = args.cities * args.headlines
+    print(f"{args.cities} cities x {args.headlines} headlines = {total}, "
+          f"token budget {news_scraper.SCORE_TOKEN_BUDGET}, latency {args.latency}s")
+    # The original code made two full-batch requests per city per cycle
+    print(f"{'original (2/city)':<20} requests={2 * args.cities:<5}")
+    try:
+        for label, per_city in (('per-city pass', True), ('cross-city batch', False)):
+            scored, elapsed, stats = run(server, synthetic_items(args.cities, args.headlines),
+                                         per_city)
+            print(f"{label:<20} requests={stats['requests']:<5} scored={scored}/{total} "
+                  f"malformed={stats['malformed']} time={elapsed:.2f}s")
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
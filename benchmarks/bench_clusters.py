@@ -0,0 +1,83 @@
+"""Benchmark of cross-city story clustering.
+
+Builds synthetic city feeds in which a given fraction of stories is
+shared between all cities. Each copy has its own source suffix, and half
+of them carry one extra word. Runs them through
+StoryClusterIndex and reports headlines/sec, the clusters found against
+the number of distinct stories, and how many headlines would still go to
+the LLM.
+
+Usage:
+    python benchmarks/bench_clusters.py --cities 8 --per-city 100 --overlap 0.3
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from story_clusters import StoryClusterIndex  # noqa: E402
+
+VOCAB = ('police council metro water power rains flood court minister traffic school '
+         'hospital market strike fire festival airport budget election protest project '
+         'road bridge railway bus park lake tax price housing crime court order city '
+         'state cabinet plan report survey record launch outage heat storm alert').split()
+SOURCES = ['The Hindu', 'Times of India', 'Hindustan Times', 'Deccan Herald', 'NDTV']
+
+
+def story(rng):
+    return [rng.choice(VOCAB) for _ in range(rng.randint(8, 12))]
+
+
+def reword(words, rng):
+    """A feed's copy of a shared story, with a word appended half of the time"""
+    return words + [rng.choice(VOCAB)] if rng.random() < 0.5 else list(words)
+
+
+def synthetic_feeds(cities, per_city, overlap, seed=1):
+    """({city: [headline]}, number of distinct stories)"""
+    rng = random.Random(seed)
+    shared = [story(rng) for _ in range(int(per_city * overlap))]
+    feeds = {}
+    for c in range(cities):
+        words = [reword(s, rng) for s in shared]
+        words += [story(rng) for _ in range(per_city - len(shared))]
+        feeds[f"City{c}"] = [f"{' '.join(w).capitalize()} - {rng.choice(SOURCES)}"
+                             for w in words]
+    return feeds, len(shared) + cities * (per_city - len(shared))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cities', type=int, default=8)
+    parser.add_argument('--per-city', type=int, default=100)
+    parser.add_argument('--overlap', type=float, default=0.3, help="share of stories in every feed")
+    parser.add_argument('--threshold', type=float, default=None)
+    args = parser.parse_args()
+
+    feeds, distinct = synthetic_feeds(args.cities, args.per_city, args.overlap)
+    headlines = [headline for items in feeds.values() for headline in items]
+    kwargs = {} if args.threshold is None else {'threshold': args.threshold}
+    index = StoryClusterIndex(**kwargs)
+    index.signatures([])  # Imports numpy outside the timed part
+    started = time.perf_counter()
+    clusters = index.assign(headlines)
+    elapsed = time.perf_counter() - started
+
+    # The copies of one shared story sit at the same position in every feed
+    shared = int(args.per_city * args.overlap)
+    grouped = sum(1 for i in range(shared)
+                  if len({clusters[c * args.per_city + i] for c in range(args.cities)}) == 1)
+    print(f"{len(headlines)} headlines, {distinct} distinct stories "
+          f"({args.overlap:.0%} shared by {args.cities} cities)")
+    print(f"  clustering      {len(headlines) / elapsed:>10,.0f} headlines/s")
+    print(f"  clusters        {len(set(clusters)):>10}  "
+          f"(shared stories fully grouped: {grouped}/{shared})")
+    print(f"  LLM headlines   {len(set(clusters)):>10}  instead of {len(headlines)} "
+          f"({1 - len(set(clusters)) / len(headlines):.0%} fewer)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,341 @@
+"""Offline end-to-end benchmark of the scraper and the Flask server.
+
+Starts the fake RSS and LLM servers, then runs server.py (NewsScraperApp
+plus the Flask app) in a child process against them. N threads poll
+/news-data the way static/js/news-updater.js does and M clients hold
+/news-stream open. Reports refresh-cycle time, endpoint latency
+percentiles, SSE delivery lag, LLM calls per minute and the server's RSS
+memory. Results are saved as JSON so runs can be compared across commits.
+
+With --workers N, collector.py does the fetching and N read-only server
+processes share its snapshot file; clients are spread over the workers.
+
+Usage:
+    python benchmarks/bench_e2e.py --cities 8 --pollers 20 --subscribers 50 --duration 60
+    python benchmarks/bench_e2e.py --workers 4 --pollers 80
+    python benchmarks/bench_e2e.py --compare benchmarks/results/e2e-<old>.json
+"""
+import argparse
+import http.client
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_openai import FakeOpenAIServer  # noqa: E402
+from fake_rss import FakeRSSServer  # noqa: E402
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+
+# Serves server.app on a free port; the port is announced on stdout
+CHILD = r"""
+from werkzeug.serving import make_server
+import server
+httpd = make_server('127.0.0.1', 0, server.app, threaded=True)
+print('\nBENCH_PORT %d' % httpd.server_port, flush=True)
+httpd.serve_forever()
+"""
+
+SNAPSHOT_UPDATED = re.compile(rb'"updated":([0-9.]+)')
+
+
+def percentiles(samples):
+    """Nearest-rank p50/p95/p99/max of latencies in seconds, reported in ms"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+    return {'count': len(ordered), 'p50_ms': round(rank(50) * 1000, 2),
+            'p95_ms': round(rank(95) * 1000, 2), 'p99_ms': round(rank(99) * 1000, 2),
+            'max_ms': round(ordered[-1] * 1000, 2)}
+
+
+def process_memory(pid):
+    """(current, peak) resident set size in MB from /proc (Linux only)"""
+    values = {}
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith(('VmRSS:', 'VmHWM:')):
+                    key, value = line.split(':', 1)
+                    values[key] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return values.get('VmRSS'), values.get('VmHWM')
+
+
+def total_memory(children):
+    """(current, peak) RSS in MB summed over the server processes"""
+    samples = [process_memory(child.pid) for child in children]
+    if any(current is None for current, _ in samples):
+        return None, None
+    return sum(current for current, _ in samples), sum(peak for _, peak in samples)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                               capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def spawn(args, env, log_path):
+    """Child process in the repo root with stdout and stderr going to log_path"""
+    with open(log_path, 'wb') as log:
+        return subprocess.Popen([sys.executable] + args, cwd=REPO_ROOT, env=env,
+                                stdout=log, stderr=subprocess.STDOUT)
+
+
+def start_server(env, log_path, code=CHILD, announce=rb'BENCH_PORT (\d+)'):
+    child = spawn(['-c', code], env, log_path)
+    # The app prints from worker threads, so look for the tagged line in its log
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if child.poll() is not None:
+            break
+        with open(log_path, 'rb') as f:
+            match = re.search(announce, f.read())
+        if match:
+            return child, int(match.group(1))
+        time.sleep(0.05)
+    child.kill()
+    with open(log_path, 'rb') as f:
+        raise RuntimeError(f"server did not start:\n{f.read()[-2000:].decode(errors='replace')}")
+
+
+class Poller(threading.Thread):
+    """Polls /news-data with the since/ETag handshake of news-updater.js"""
+    def __init__(self, base_url, interval, stop):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.interval = interval
+        self.stop = stop
+        self.latencies = []
+        self.statuses = {}
+        self.bytes = 0  # response bodies as sent (compressed or not)
+
+    def run(self):
+        session = requests.Session()
+        version, etag = None, None
+        while not self.stop.is_set():
+            headers = {'If-None-Match': etag} if etag else {}
+            params = {'since': version} if version else {}
+            started = time.perf_counter()
+            try:
+                response = session.get(f"{self.base_url}/news-data", params=params,
+                                       headers=headers, timeout=30)
+                self.latencies.append(time.perf_counter() - started)
+                self.statuses[response.status_code] = self.statuses.get(response.status_code, 0) + 1
+                self.bytes += int(response.headers.get('Content-Length', len(response.content)))
+                if response.status_code == 200:
+                    version = response.json().get('version')
+                    etag = response.headers.get('ETag')
+            except requests.RequestException:
+                self.statuses['error'] = self.statuses.get('error', 0) + 1
+            self.stop.wait(self.interval)
+
+
+class Subscriber(threading.Thread):
+    """Holds /news-stream open and measures publish-to-receive lag"""
+    def __init__(self, host, port, stop):
+        super().__init__(daemon=True)
+        self.host = host
+        self.port = port
+        self.stop = stop
+        self.events = 0
+        self.lags = []
+        self.error = None
+
+    def run(self):
+        try:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            conn.request('GET', '/news-stream')
+            response = conn.getresponse()
+            while not self.stop.is_set():
+                line = response.readline()
+                if not line:
+                    break
+                if not line.startswith(b'data: '):
+                    continue
+                received = time.time()
+                self.events += 1
+                match = SNAPSHOT_UPDATED.search(line, 0, 200)
+                # The first frame is the catch-up copy of an older snapshot
+                if match and self.events > 1:
+                    self.lags.append(received - float(match.group(1)))
+            conn.close()
+        except (OSError, http.client.HTTPException) as e:
+            if not self.stop.is_set():
+                self.error = str(e)
+
+
+def run(args):
+    rss = FakeRSSServer(items=args.items, latency=args.rss_latency,
+                        change_interval=args.change).start()
+    llm = FakeOpenAIServer(latency=args.llm_latency, failure_rate=args.llm_failure_rate).start()
+    tmp = tempfile.TemporaryDirectory()
+    registry_path = os.path.join(tmp.name, 'cities.json')
+    with open(registry_path, 'w') as f:
+        json.dump(rss.registry([f"City{i}" for i in range(args.cities)]), f)
+    env = dict(os.environ, NEWS_CITIES_FILE=registry_path,
+               OPENROUTER_BASE_URL=llm.base_url, OPENROUTER_API_KEY='fake',
+               NEWS_HISTORY_DB=os.path.join(tmp.name, 'history.db'),
+               NEWS_REFRESH_MIN=str(args.refresh))
+    if args.llm_rpm is not None:
+        env['NEWS_LLM_RPM'] = str(args.llm_rpm)
+
+    started = time.monotonic()
+    children, ports = [], []
+    if args.workers:
+        env['NEWS_SNAPSHOT_FILE'] = os.path.join(tmp.name, 'news.snapshot')
+        children.append(spawn(['collector.py'], env, os.path.join(tmp.name, 'collector.log')))
+    for worker in range(max(args.workers, 1)):
+        child, port = start_server(env, os.path.join(tmp.name, f'server-{worker}.log'))
+        children.append(child)
+        ports.append(port)
+    base_url = f"http://127.0.0.1:{ports[0]}"
+    try:
+        # Time to the first 200 from /news-data
+        while time.monotonic() - started < 60:
+            try:
+                if requests.get(f"{base_url}/news-data", timeout=5).status_code == 200:
+                    break
+            except requests.RequestException:
+                pass
+            time.sleep(0.05)
+        first_data = time.monotonic() - started
+
+        stop = threading.Event()
+        pollers = [Poller(f"http://127.0.0.1:{ports[i % len(ports)]}", args.poll_interval, stop)
+                   for i in range(args.pollers)]
+        subscribers = [Subscriber('127.0.0.1', ports[i % len(ports)], stop)
+                       for i in range(args.subscribers)]
+        llm_before = llm.stats()['requests']
+        rss_before = rss.stats()['requests']
+        for client in subscribers + pollers:
+            client.start()
+
+        memory = []
+        window_started = time.monotonic()
+        while time.monotonic() - window_started < args.duration:
+            memory.append(total_memory(children)[0])
+            time.sleep(1)
+        elapsed = time.monotonic() - window_started
+        status = requests.get(f"{base_url}/status", timeout=10).json()
+        current_rss, peak_rss = total_memory(children)
+        stop.set()
+    finally:
+        for child in children:
+            child.terminate()
+        for child in children:
+            try:
+                child.wait(10)
+            except subprocess.TimeoutExpired:
+                child.kill()
+        rss.stop()
+        llm.stop()
+        tmp.cleanup()
+
+    poll_statuses = {}
+    for poller in pollers:
+        for code, count in poller.statuses.items():
+            poll_statuses[str(code)] = poll_statuses.get(str(code), 0) + count
+    refresh = status.get('refresh', {})
+    cycles = refresh.get('recent_cycle_seconds', [])
+    llm_calls = llm.stats()['requests'] - llm_before
+    samples = [value for value in memory if value is not None]
+    return {
+        'first_data_s': round(first_data, 3),
+        'refresh_cycle': percentiles(cycles),
+        'refresh_cycles_total': refresh.get('cycles'),
+        'news_data': percentiles([s for poller in pollers for s in poller.latencies]),
+        'news_data_statuses': poll_statuses,
+        'news_data_rps': round(sum(len(p.latencies) for p in pollers) / elapsed, 1),
+        'news_data_kb_per_s': round(sum(p.bytes for p in pollers) / elapsed / 1024, 1),
+        'sse_lag': percentiles([s for sub in subscribers for s in sub.lags]),
+        'sse_events': sum(sub.events for sub in subscribers),
+        'sse_errors': sum(1 for sub in subscribers if sub.error),
+        'llm_calls_per_min': round(llm_calls / elapsed * 60, 2),
+        'llm_governor': status.get('llm'),
+        'rss_fetches_per_min': round((rss.stats()['requests'] - rss_before) / elapsed * 60, 2),
+        'rss_mb': {'mean': round(sum(samples) / len(samples), 1) if samples else None,
+                   'final': current_rss and round(current_rss, 1),
+                   'peak': peak_rss and round(peak_rss, 1)}
+    }
+
+
+def flatten(results, prefix=''):
+    """{'a': {'b': 1}} -> {'a.b': 1}, numbers only"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(old_path, new_results):
+    with open(old_path) as f:
+        old = json.load(f)
+    print(f"\nCompared with {old_path} (commit {old.get('commit')})")
+    old_flat, new_flat = flatten(old['results']), flatten(new_results)
+    for name in sorted(set(old_flat) & set(new_flat)):
+        before, after = old_flat[name], new_flat[name]
+        change = f"{(after - before) / before * 100:+7.1f}%" if before else "      -"
+        print(f"  {name:<36} {before:>12,.2f} -> {after:>12,.2f}  {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cities', type=int, default=8)
+    parser.add_argument('--items', type=int, default=50, help="items per feed")
+    parser.add_argument('--rss-latency', type=float, default=0.05, help="seconds per feed request")
+    parser.add_argument('--change', type=float, default=30, help="seconds between feed updates")
+    parser.add_argument('--llm-latency', type=float, default=0.2, help="seconds per LLM request")
+    parser.add_argument('--llm-failure-rate', type=float, default=0.0)
+    parser.add_argument('--llm-rpm', type=float, default=None, help="NEWS_LLM_RPM for the server")
+    parser.add_argument('--refresh', type=float, default=5, help="NEWS_REFRESH_MIN for the server")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="read-only server processes behind collector.py (0: one embedded server)")
+    parser.add_argument('--pollers', type=int, default=20, help="concurrent /news-data clients")
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    parser.add_argument('--subscribers', type=int, default=50, help="concurrent /news-stream clients")
+    parser.add_argument('--duration', type=float, default=60, help="measured seconds")
+    parser.add_argument('--output', help="results file (default benchmarks/results/e2e-<commit>-<time>.json)")
+    parser.add_argument('--compare', help="earlier results file to diff against")
+    args = parser.parse_args()
+
+    results = run(args)
+    commit = git_commit()
+    record = {'commit': commit, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'config': vars(args), 'results': results}
+    print(json.dumps(results, indent=2))
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"e2e-{commit or 'unknown'}-"
+                                           f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w') as f:
+        json.dump(record, f, indent=2)
+    print(f"Saved {output}")
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
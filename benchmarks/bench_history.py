@@ -0,0 +1,78 @@
+"""Benchmark of the SQLite history store as it grows.
+
+Fills a temporary database with synthetic refresh cycles, then times a
+batched cycle insert, warm-start reads and multi-day trend queries.
+
+Usage:
+    python benchmarks/bench_history.py --rows 1000000 --cities 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history_store import HistoryStore  # noqa: E402
+
+
+def synthetic_cycle(cities, per_city, cycle, published_at):
+    # (headline, source, published_at, link, sentiment), as news_scraper.NewsItem
+    return {f"City{c}": [(
+        f"City{c} headline {cycle}-{i}",
+        f"Source {i % 7}",
+        published_at - i,
+        f"https://example.invalid/{c}/{cycle}/{i}",
+        1 + (cycle + i + c) % 5
+    ) for i in range(per_city)] for c in range(cities)}
+
+
+def timed(func, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - started)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--cities', type=int, default=10)
+    parser.add_argument('--per-city', type=int, default=20, help="new items per city per cycle")
+    parser.add_argument('--days', type=float, default=30, help="time span covered by the rows")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(os.path.join(tmp, 'history.db'), retention_days=args.days * 2)
+        now = time.time()
+        per_cycle = args.cities * args.per_city
+        cycles = max(args.rows // per_cycle, 1)
+        step = args.days * 86400 / cycles
+
+        started = time.perf_counter()
+        for cycle in range(cycles):
+            store.record(synthetic_cycle(args.cities, args.per_city, cycle,
+                                         now - (cycles - cycle) * step), now=now)
+        fill = time.perf_counter() - started
+        rows = store.count()
+        print(f"{rows:,} rows in {fill:.1f}s ({rows / fill:,.0f} rows/s, {per_cycle} per cycle)")
+
+        _, insert = timed(lambda: store.record(
+            synthetic_cycle(args.cities, args.per_city, cycles + 1, now), now=now))
+        print(f"  one cycle insert ({per_cycle} rows)    {insert * 1000:8.2f} ms")
+        _, warm = timed(lambda: store.recent_items('City0', now - 3600))
+        print(f"  warm start read (1 city, 1h)       {warm * 1000:8.2f} ms")
+        for days, bucket in ((1, 3600), (7, 3600), (args.days, 86400)):
+            series, elapsed = timed(lambda: store.sentiment_trend(
+                'City0', now - days * 86400, bucket))
+            print(f"  trend {days:>4g} days, {bucket // 60:>4} min buckets    "
+                  f"{elapsed * 1000:8.2f} ms  ({len(series)} points)")
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
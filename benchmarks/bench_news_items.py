@@ -0,0 +1,109 @@
+"""Memory and read throughput of the cached news items.
+
+Compares the original cache layout (a list of six-key dicts per city,
+copied under the lock on every read) with the immutable NewsItem tuples
+that NewsScraperApp now publishes. Both are filled from the same
+synthetic feeds. Reports retained memory per item, cache reads/sec and
+the cost of JSON-encoding one city.
+
+Usage:
+    python benchmarks/bench_news_items.py --items 10000 --cities 8
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from news_scraper import NewsScraperApp, iter_rss_items  # noqa: E402
+from fake_rss import build_feed  # noqa: E402
+from bench_rss_parse import legacy_parse  # noqa: E402
+
+
+class LegacyCache:
+    """news_cache as it was: dict items, copied under the lock on every read"""
+    def __init__(self, feeds):
+        self.cache_lock = threading.Lock()
+        self.news_cache = {city: legacy_parse(content) for city, content in feeds.items()}
+
+    def get_news_items(self, city):
+        with self.cache_lock:
+            return self.news_cache.get(city, []).copy()
+
+    def encode(self, city):
+        return json.dumps(self.news_cache[city], separators=(',', ':'))
+
+
+def compact_cache(feeds):
+    app = NewsScraperApp.__new__(NewsScraperApp)
+    app.cache_lock = threading.Lock()
+    app.news_cache = {city: tuple(iter_rss_items(content)) for city, content in feeds.items()}
+    app._city_fragments = {}
+    return app
+
+
+def retained(build):
+    """(result, bytes still allocated after build())"""
+    tracemalloc.start()
+    result = build()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, current
+
+
+def reads_per_second(get_items, city, seconds=1.0):
+    reads, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        for _ in range(100):
+            get_items(city)
+        reads += 100
+    return reads / (time.perf_counter() - started)
+
+
+def timed(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=10000, help="cached items per city")
+    parser.add_argument('--cities', type=int, default=8)
+    args = parser.parse_args()
+
+    feeds = {f"City{c}": build_feed(f"City{c}", args.items) for c in range(args.cities)}
+    total = args.items * args.cities
+    print(f"{args.cities} cities x {args.items} items = {total:,} cached items")
+
+    legacy, legacy_bytes = retained(lambda: LegacyCache(feeds))
+    compact, compact_bytes = retained(lambda: compact_cache(feeds))
+    city = 'City0'
+    compact_items = compact.news_cache[city]
+    variants = [
+        ('dict list + copy', legacy_bytes, legacy.get_news_items,
+         lambda: legacy.encode(city)),
+        ('NewsItem tuples', compact_bytes, compact.get_news_items,
+         lambda: json.dumps([item.to_json() for item in compact_items], separators=(',', ':'))),
+    ]
+    for label, size, get_items, encode in variants:
+        print(f"  {label:<18} {size / 1e6:8.1f} MB  {size / total:6.0f} B/item  "
+              f"{reads_per_second(get_items, city):>12,.0f} reads/s  "
+              f"encode 1 city {timed(encode) * 1000:7.1f} ms")
+    # Snapshots re-encode a city only when its item tuple was replaced
+    ids = tuple(range(len(compact_items)))
+    compact._encode_city(city, compact_items, ids, "Neutral")
+    unchanged = timed(lambda: compact._encode_city(city, compact_items, ids, "Neutral"))
+    print(f"  re-publishing an unchanged city: {unchanged * 1e6:.1f} us")
+
+
+if __name__ == '__main__':
+    main()
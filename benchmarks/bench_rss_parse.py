@@ -0,0 +1,96 @@
+"""Micro-benchmark of RSS parsing on large synthetic feeds.
+
+Compares the original ElementTree-based item loop (full tree, repeated
+item.find, strptime and a pytz lookup per item) with the streaming
+news_scraper.iter_rss_items parser. Reports items/sec and peak traced memory.
+
+Usage:
+    python benchmarks/bench_rss_parse.py --items 10000 50000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytz  # noqa: E402
+
+from news_scraper import iter_rss_items  # noqa: E402
+from fake_rss import build_feed  # noqa: E402
+
+
+def legacy_parse(content):
+    """The item loop fetch_news_for_city used before the streaming parser"""
+    root_element = ET.fromstring(content)
+    news_items = []
+    for item in root_element.findall('.//item'):
+        title = item.find('title').text
+        link = item.find('link').text
+        pubDate = item.find('pubDate').text
+        source = item.find('source').text if item.find('source') is not None else "Unknown Source"
+        try:
+            pub_datetime = datetime.strptime(pubDate, '%a, %d %b %Y %H:%M:%S %Z')
+        except ValueError:
+            pub_datetime = datetime.now()
+        pub_datetime = pub_datetime.replace(tzinfo=pytz.UTC).astimezone(pytz.timezone('Asia/Kolkata'))
+        timestamp = pub_datetime.strftime('%I:%M %p')
+        news_items.append({
+            'headline': title.strip(),
+            'source': source.strip(),
+            'subheading': f"Published at {timestamp}",
+            'timestamp': timestamp,
+            'published_at': pub_datetime.timestamp(),
+            'link': link.strip()
+        })
+    return news_items
+
+
+def streaming_count(content):
+    """Consume the generator without keeping items, as a streaming consumer would"""
+    return sum(1 for _ in iter_rss_items(content))
+
+
+def measure(func, content, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(content)
+        best = min(best, time.perf_counter() - started)
+    count = result if isinstance(result, int) else len(result)
+    del result
+
+    tracemalloc.start()
+    result = func(content)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return count, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, nargs='+', default=[10000, 50000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    variants = [
+        ('legacy ElementTree', legacy_parse),
+        ('streaming -> list', lambda content: list(iter_rss_items(content))),
+        ('streaming consume', streaming_count),
+    ]
+    for size in args.items:
+        content = build_feed('Bench', size)
+        print(f"{size} items, {len(content) / 1e6:.1f} MB feed")
+        for label, func in variants:
+            count, elapsed, peak = measure(func, content, args.repeat)
+            print(f"  {label:<20} {count / elapsed:>10,.0f} items/s  "
+                  f"{elapsed * 1000:8.1f} ms  peak {peak / 1e6:7.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Throughput of the sentiment backends (headlines/sec).
+
+Scores the same synthetic headlines with the local NumPy lexicon backend
+and with the OpenRouter backend pointed at benchmarks/fake_openai.py, so
+the remote number is a best case (no network, no model time beyond the
+injected latency).
+
+Usage:
+    python benchmarks/bench_sentiment.py --headlines 10000 --latency 0.05
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Measure scoring itself, not the production request budget
+os.environ.setdefault('NEWS_LLM_RPM', '0')
+os.environ.setdefault('NEWS_LLM_TPM', '0')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from openai import OpenAI  # noqa: E402
+
+from news_scraper import LexiconSentimentBackend, OpenRouterSentimentBackend  # noqa: E402
+from fake_openai import FakeOpenAIServer  # noqa: E402
+
+TEMPLATES = [
+    "{city} metro line launch boosts commuters as ridership hits record",
+    "Two killed, several injured in {city} road accident",
+    "{city} civic body approves new budget for parks and roads",
+    "Heavy rains cause waterlogging and traffic jam across {city}",
+    "{city} startup wins national award for innovative water project",
+    "Police arrest gang over {city} online fraud scam",
+    "{city} schools to remain open, says education department",
+]
+CITIES = ['Bangalore', 'Mumbai', 'Delhi', 'Pune', 'Chennai', 'Kolkata']
+
+
+def synthetic_entries(count):
+    return [(CITIES[i % len(CITIES)],
+             TEMPLATES[i % len(TEMPLATES)].format(city=CITIES[i % len(CITIES)]) + f" #{i}")
+            for i in range(count)]
+
+
+def timed(label, backend, entries, repeat=1):
+    best, scored = float('inf'), 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        scored = len(backend.score(entries))
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:<28} {scored:>6} scored  {best * 1000:10.2f} ms  "
+          f"{scored / best:>14,.0f} headlines/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--headlines', type=int, default=10000)
+    parser.add_argument('--latency', type=float, default=0.05, help="fake LLM seconds per request")
+    args = parser.parse_args()
+
+    entries = synthetic_entries(args.headlines)
+    lexicon = LexiconSentimentBackend()
+    print(f"{args.headlines} headlines")
+    timed("lexicon (batch)", lexicon, entries, repeat=5)
+    timed("lexicon (batch of 50)", lexicon, entries[:50], repeat=20)
+
+    server = FakeOpenAIServer(latency=args.latency).start()
+    try:
+        client = OpenAI(base_url=server.base_url, api_key="fake", max_retries=0)
+        remote = OpenRouterSentimentBackend(lambda: client)
+        timed(f"openrouter stub ({args.latency}s)", remote, entries)
+        print(f"  openrouter stub requests: {server.stats()['requests']}")
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""Load test of idle /news-stream connections.
+
+Runs asgi_app.py under uvicorn or the threaded Flask server
+in a child process against the fake RSS and LLM servers, then opens
+thousands of SSE connections that just listen. Reports the server's RSS
+memory per connected client at several checkpoints, how long the next
+snapshot takes to reach every client, and how many connections failed.
+
+Usage:
+    python benchmarks/bench_sse_clients.py --clients 5000
+    python benchmarks/bench_sse_clients.py --server flask --clients 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_e2e import CHILD, percentiles, process_memory, start_server  # noqa: E402
+from fake_openai import FakeOpenAIServer  # noqa: E402
+from fake_rss import FakeRSSServer  # noqa: E402
+
+ASYNC_CHILD = r"""
+import uvicorn
+import asgi_app
+uvicorn.run(asgi_app.app, host='127.0.0.1', port=0, backlog=4096, access_log=False)
+"""
+
+
+class StreamClient:
+    """One idle SSE connection that records when each frame arrives"""
+    def __init__(self):
+        self.frames = []  # (version, received at)
+        self.error = None
+
+    async def run(self, port, connected):
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port, limit=4 * 1024 * 1024)
+            writer.write(b'GET /news-stream HTTP/1.1\r\nHost: bench\r\n\r\n')
+            await writer.drain()
+            head = await reader.readuntil(b'\r\n\r\n')
+            connected()
+            chunked = b'transfer-encoding: chunked' in head.lower()
+            buffered = b''
+            while True:
+                if chunked:
+                    size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                    buffered += (await reader.readexactly(size + 2))[:-2]
+                else:
+                    data = await reader.read(65536)
+                    if not data:
+                        raise asyncio.IncompleteReadError(buffered, None)
+                    buffered += data
+                *frames, buffered = buffered.split(b'\n\n')
+                for frame in frames:
+                    if frame.startswith(b'id: '):
+                        self.frames.append((int(frame[4:frame.index(b'\n')]), time.time()))
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+            self.error = repr(e)
+
+
+async def load(port, pid, args):
+    clients, tasks, checkpoints = [], [], []
+    baseline = process_memory(pid)[0]
+    connected = 0
+
+    def on_connect():
+        nonlocal connected
+        connected += 1
+
+    marks = sorted({args.clients // 4, args.clients // 2, args.clients})
+    opened = 0
+    for mark in marks:
+        while opened < mark:
+            batch = min(args.batch, mark - opened)
+            for _ in range(batch):
+                client = StreamClient()
+                clients.append(client)
+                tasks.append(asyncio.ensure_future(client.run(port, on_connect)))
+            opened += batch
+            await asyncio.sleep(0.05)
+        deadline = time.monotonic() + 30
+        while connected < mark - sum(1 for c in clients if c.error) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        await asyncio.sleep(args.settle)
+        rss = process_memory(pid)[0]
+        checkpoints.append({'clients': connected, 'rss_mb': rss and round(rss, 1),
+                            'kb_per_client': round((rss - baseline) * 1024 / connected, 1)
+                            if rss and baseline and connected else None})
+        print(f"  {connected:>6} clients  RSS {rss:8.1f} MB  "
+              f"{checkpoints[-1]['kb_per_client']} KB/client", flush=True)
+
+    # Wait for a snapshot published after everyone connected
+    started = time.time()
+    newest = max((c.frames[-1][0] for c in clients if c.frames), default=0)
+    deadline = time.monotonic() + args.push_timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.25)
+        if any(c.frames and c.frames[-1][0] > newest for c in clients):
+            await asyncio.sleep(args.settle)
+            break
+    pushed = [next(received for version, received in c.frames if version > newest)
+              for c in clients if c.frames and c.frames[-1][0] > newest]
+    for task in tasks:
+        task.cancel()
+    return {
+        'baseline_rss_mb': baseline and round(baseline, 1),
+        'checkpoints': checkpoints,
+        'connect_errors': sum(1 for c in clients if c.error),
+        'caught_up': sum(1 for c in clients if c.frames),
+        'received_push': len(pushed),
+        'push_spread': percentiles([received - min(pushed) for received in pushed])
+        if pushed else None,
+        'waited_for_push_s': round(time.time() - started, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--server', choices=('async', 'flask'), default='async')
+    parser.add_argument('--clients', type=int, default=5000)
+    parser.add_argument('--batch', type=int, default=250, help="connections opened per step")
+    parser.add_argument('--settle', type=float, default=3, help="idle seconds before measuring")
+    parser.add_argument('--change', type=float, default=20, help="seconds between feed updates")
+    parser.add_argument('--push-timeout', type=float, default=90)
+    parser.add_argument('--cities', type=int, default=3)
+    args = parser.parse_args()
+
+    rss = FakeRSSServer(items=30, change_interval=args.change).start()
+    llm = FakeOpenAIServer(latency=0.05).start()
+    tmp = tempfile.TemporaryDirectory()
+    registry_path = os.path.join(tmp.name, 'cities.json')
+    with open(registry_path, 'w') as f:
+        json.dump(rss.registry([f"City{i}" for i in range(args.cities)]), f)
+    env = dict(os.environ, NEWS_CITIES_FILE=registry_path,
+               OPENROUTER_BASE_URL=llm.base_url, OPENROUTER_API_KEY='fake',
+               NEWS_HISTORY_DB=os.path.join(tmp.name, 'history.db'),
+               NEWS_REFRESH_MIN='2', NEWS_ITEM_LOG='off')
+    if args.server == 'async':
+        child, port = start_server(env, os.path.join(tmp.name, 'server.log'), ASYNC_CHILD,
+                                   rb'Uvicorn running on http://[^:]+:(\d+)')
+    else:
+        child, port = start_server(env, os.path.join(tmp.name, 'server.log'), CHILD)
+    print(f"{args.server} server on port {port}, opening {args.clients} SSE clients")
+    try:
+        time.sleep(3)  # First refresh cycle
+        results = asyncio.run(load(port, child.pid, args))
+    finally:
+        child.terminate()
+        child.wait(10)
+        rss.stop()
+        llm.stop()
+        tmp.cleanup()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
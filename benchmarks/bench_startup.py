@@ -0,0 +1,96 @@
+"""Cold-start benchmark: time from interpreter start to first published data.
+
+Each run starts a fresh interpreter that imports news_scraper, builds a
+headless NewsScraperApp against local fake RSS and LLM endpoints and waits
+for the first snapshot. Reports import time, construction time,
+time-to-first-data, peak RSS and which heavy modules got imported.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5 --cities 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_openai import FakeOpenAIServer  # noqa: E402
+from fake_rss import FakeRSSServer  # noqa: E402
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, resource, sys, time
+HEAVY = ('tkinter', 'selenium', 'openai', 'numpy')
+started = time.perf_counter()
+import news_scraper
+imported = time.perf_counter()
+import_modules = [m for m in HEAVY if m in sys.modules]
+app = news_scraper.NewsScraperApp()
+constructed = time.perf_counter()
+while app.snapshot is None and time.perf_counter() - started < 60:
+    time.sleep(0.005)
+first_data = time.perf_counter()
+print('\nBENCH_RESULT ' + json.dumps({
+    'import_s': imported - started,
+    'construct_s': constructed - imported,
+    'first_data_s': first_data - started,
+    'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'import_modules': import_modules,
+    'heavy_modules': [m for m in HEAVY if m in sys.modules]
+}), flush=True)
+"""
+
+
+def run_once(env):
+    result = subprocess.run([sys.executable, '-c', CHILD], cwd=REPO_ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+    # The app prints from worker threads, so look for the tagged line
+    marker = result.stdout.rfind('BENCH_RESULT ')
+    if marker != -1:
+        return json.loads(result.stdout[marker:].split(' ', 1)[1].splitlines()[0])
+    raise RuntimeError(f"benchmark child failed:\n{result.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--cities', type=int, default=3)
+    parser.add_argument('--items', type=int, default=50, help="items per feed")
+    args = parser.parse_args()
+
+    rss = FakeRSSServer(items=args.items).start()
+    llm = FakeOpenAIServer().start()
+    tmp = tempfile.TemporaryDirectory()
+    registry_path = os.path.join(tmp.name, 'cities.json')
+    with open(registry_path, 'w') as f:
+        json.dump(rss.registry([f"City{i}" for i in range(args.cities)]), f)
+
+    env = dict(os.environ, NEWS_CITIES_FILE=registry_path,
+               OPENROUTER_BASE_URL=llm.base_url, OPENROUTER_API_KEY='fake')
+    try:
+        runs = []
+        for run in range(args.runs):
+            # A fresh history database per run, so every start is really cold
+            env['NEWS_HISTORY_DB'] = os.path.join(tmp.name, f'history-{run}.db')
+            runs.append(run_once(env))
+    finally:
+        tmp.cleanup()
+        rss.stop()
+        llm.stop()
+
+    print(f"{args.runs} cold starts, {args.cities} cities x {args.items} items")
+    for key in ('import_s', 'construct_s', 'first_data_s', 'peak_rss_mb'):
+        values = [run[key] for run in runs]
+        print(f"  {key:<14} median={statistics.median(values):8.3f}  "
+              f"min={min(values):8.3f}  max={max(values):8.3f}")
+    print(f"  heavy modules loaded by import: {runs[-1]['import_modules'] or 'none'}")
+    print(f"  heavy modules loaded by first data: {runs[-1]['heavy_modules'] or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
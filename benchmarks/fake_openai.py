@@ -0,0 +1,179 @@
+"""Local fake OpenAI-compatible chat endpoint for offline runs.
+
+Answers /v1/chat/completions with a JSON array of headline scores for the
+batched scoring prompt in news_scraper.py, using a small keyword lexicon so
+results are deterministic. Latency, failures and malformed output can be
+injected to exercise the batching fallbacks.
+
+Usage:
+    python benchmarks/fake_openai.py --port 8090 --latency 0.2 --malformed-rate 0.1
+    OPENROUTER_BASE_URL=http://127.0.0.1:8090/v1 python server.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+POSITIVE_WORDS = {'win', 'wins', 'growth', 'boost', 'record', 'launch', 'celebrates',
+                  'good', 'success', 'relief', 'opens', 'award', 'rise', 'gains'}
+NEGATIVE_WORDS = {'crash', 'dead', 'death', 'killed', 'fire', 'flood', 'protest',
+                  'arrested', 'scam', 'attack', 'fall', 'loss', 'strike', 'accident'}
+
+HEADLINE_LINE = re.compile(r'^(\d+)\. (?:\[[^\]]*\] )?(.*)$', re.M)
+
+
+def score_headline(headline):
+    """Deterministic 1-5 score from keyword hits"""
+    words = set(re.findall(r'[a-z]+', headline.lower()))
+    balance = len(words & POSITIVE_WORDS) - len(words & NEGATIVE_WORDS)
+    return max(1, min(5, 3 + balance))
+
+
+class FakeOpenAIServer:
+    """Threaded fake chat-completions server with injectable faults"""
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0,
+                 failure_rate=0.0, malformed_rate=0.0, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.malformed_rate = malformed_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.headlines = 0
+        self.failures = 0
+        self.malformed = 0
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'headlines': self.headlines,
+                'failures': self.failures,
+                'malformed': self.malformed
+            }
+
+    def reset_stats(self):
+        with self.lock:
+            self.requests = self.headlines = self.failures = self.malformed = 0
+
+    def _roll(self, rate):
+        with self.lock:
+            return rate > 0 and self.random.random() < rate
+
+    def completion(self, prompt):
+        """Return (status, content) for a chat prompt"""
+        headlines = HEADLINE_LINE.findall(prompt.split('Headlines:', 1)[-1])
+        with self.lock:
+            self.requests += 1
+            self.headlines += len(headlines)
+        if self.latency:
+            time.sleep(self.latency)
+        if self._roll(self.failure_rate):
+            with self.lock:
+                self.failures += 1
+            return 503, None
+
+        rows = [{'id': int(number), 'score': score_headline(text)}
+                for number, text in headlines]
+        content = json.dumps(rows)
+        if self._roll(self.malformed_rate):
+            with self.lock:
+                self.malformed += 1
+            content = "Sure! Here are the scores: " + content[:len(content) // 2]
+        return 200, content
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.rstrip('/').endswith('/stats'):
+                    self._send_json(200, server.stats())
+                else:
+                    self._send_json(404, {'error': {'message': 'not found'}})
+
+            def do_POST(self):
+                if not self.path.rstrip('/').endswith('/chat/completions'):
+                    self._send_json(404, {'error': {'message': 'not found'}})
+                    return
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                prompt = "\n".join(message.get('content', '')
+                                   for message in request.get('messages', []))
+                status, content = server.completion(prompt)
+                if status != 200:
+                    self._send_json(status, {'error': {'message': 'injected failure'}})
+                    return
+                self._send_json(200, {
+                    'id': f"chatcmpl-fake-{time.time_ns()}",
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': request.get('model', 'fake'),
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': content},
+                        'finish_reason': 'stop'
+                    }],
+                    'usage': {
+                        'prompt_tokens': len(prompt) // 4,
+                        'completion_tokens': len(content) // 4,
+                        'total_tokens': (len(prompt) + len(content)) // 4
+                    }
+                })
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds per request")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="fraction answered with 503")
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help="fraction with truncated JSON")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(args.host, args.port, args.latency,
+                              args.failure_rate, args.malformed_rate)
+    print(f"Fake OpenAI endpoint at {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""Local fake Google News RSS server for offline runs.
+
+Serves synthetic feeds at /rss/<city>. Item count, response latency and
+change rate are configurable per server and can be overridden per request
+with the `items`, `delay` and `change` query parameters. Every `change`
+seconds `change_size` new stories are pushed onto the top of each feed.
+Responses carry an ETag and answer If-None-Match with 304.
+
+Usage:
+    python benchmarks/fake_rss.py --port 8091 --items 100 --latency 0.2 --change 30
+"""
+import argparse
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+WORDS = ['metro', 'record', 'flood', 'launch', 'traffic', 'protest', 'growth',
+         'council', 'market', 'accident', 'festival', 'rains', 'award', 'strike']
+SOURCES = ['The Hindu', 'Times of India', 'Hindustan Times', 'Deccan Herald',
+           'Indian Express', 'Mint']
+
+
+def build_feed(city, items, generation=0, now=None, step=None, spacing=60):
+    """RSS 2.0 bytes shaped like a Google News search feed.
+
+    Each generation adds `step` (default: all `items`) newer stories at the
+    top; the rest of the feed is the previous generation shifted down. The
+    top story is published at `now` and each older one `spacing` seconds
+    earlier.
+    """
+    now = now or time.time()
+    step = items if step is None else step
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<rss version="2.0"><channel>',
+             f'<title>"{escape(city)}" - Google News</title>']
+    newest = generation * step + items - 1
+    for i in range(items):
+        n = newest - i
+        headline = (f"{city} {WORDS[n % len(WORDS)]} {WORDS[(n * 7) % len(WORDS)]} "
+                    f"story {n}")
+        source = SOURCES[n % len(SOURCES)]
+        link = f"https://news.example.invalid/{city.lower()}/{n}"
+        parts.append(
+            f'<item><title>{escape(headline)} - {escape(source)}</title>'
+            f'<link>{link}</link><guid isPermaLink="false">{city.lower()}-{n}</guid>'
+            f'<pubDate>{formatdate(now - i * spacing, usegmt=True)}</pubDate>'
+            f'<description>{escape(headline)}</description>'
+            f'<source url="https://{source.replace(" ", "").lower()}.example">'
+            f'{escape(source)}</source></item>')
+    parts.append('</channel></rss>')
+    return ''.join(parts).encode('utf-8')
+
+
+class FakeRSSServer:
+    """Threaded RSS server; feeds are built once per (city, size, generation)"""
+    def __init__(self, host='127.0.0.1', port=0, items=50, latency=0.0,
+                 change_interval=0.0, change_size=None):
+        self.items = items
+        self.latency = latency
+        self.change_interval = change_interval  # seconds, 0 = feeds never change
+        self.change_size = change_size  # new stories per change (default items // 10)
+        self.started = time.monotonic()
+        self.epoch = time.time()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+        self._feeds = {}  # (city, items) -> (generation, body, etag)
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def feed_url(self, city, **params):
+        query = '&'.join(f"{key}={value}" for key, value in params.items())
+        return f"{self.base_url}/rss/{city}" + (f"?{query}" if query else "")
+
+    def registry(self, cities, **params):
+        """City registry dict suitable for NEWS_CITIES_FILE"""
+        return {city: self.feed_url(city, **params) for city in cities}
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def generation(self, change_interval):
+        if change_interval <= 0:
+            return 0
+        return int((time.monotonic() - self.started) // change_interval)
+
+    def feed(self, city, items, change_interval=None):
+        """(body, etag) of the feed's current generation"""
+        if change_interval is None:
+            change_interval = self.change_interval
+        generation = self.generation(change_interval)
+        key = (city, items)
+        with self.lock:
+            self.requests += 1
+            cached = self._feeds.get(key)
+            if cached is None or cached[0] != generation:
+                step = self.change_size or max(items // 10, 1)
+                # Stories keep their publish time across generations, like a real feed
+                spacing = change_interval / step if change_interval > 0 else 60
+                body = build_feed(city, items, generation, step=step, spacing=spacing,
+                                  now=self.epoch + generation * max(change_interval, 0))
+                cached = self._feeds[key] = (generation, body,
+                                             f'"{city}-{items}-{generation}"')
+        return cached[1], cached[2]
+
+    def stats(self):
+        with self.lock:
+            return {'requests': self.requests, 'not_modified': self.not_modified}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if not parsed.path.startswith('/rss/'):
+                    self.send_error(404)
+                    return
+                query = parse_qs(parsed.query)
+                city = parsed.path[len('/rss/'):] or 'city'
+                items = int(query.get('items', [server.items])[0])
+                delay = float(query.get('delay', [server.latency])[0])
+                change = float(query.get('change', [server.change_interval])[0])
+                if delay:
+                    time.sleep(delay)
+                body, etag = server.feed(city, items, change)
+                if self.headers.get('If-None-Match') == etag:
+                    with server.lock:
+                        server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/rss+xml; charset=utf-8')
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8091)
+    parser.add_argument('--items', type=int, default=50, help="items per feed")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds per request")
+    parser.add_argument('--change', type=float, default=0.0,
+                        help="seconds between feed updates (0 = static)")
+    parser.add_argument('--change-size', type=int, default=None,
+                        help="new stories per update (default items / 10)")
+    args = parser.parse_args()
+
+    server = FakeRSSServer(args.host, args.port, args.items, args.latency,
+                           args.change, args.change_size)
+    print(f"Fake RSS feeds at {server.base_url}/rss/<city>")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
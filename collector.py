@@ -0,0 +1,39 @@
+"""Standalone collector for multi-worker serving.
+
+Runs the scraper (feeds, scoring, history) once and publishes every
+snapshot, plus its status, metrics and trends, to NEWS_SNAPSHOT_FILE.
+Web workers started with the same NEWS_SNAPSHOT_FILE only read that file:
+
+    NEWS_SNAPSHOT_FILE=/tmp/news.snapshot python collector.py
+    NEWS_SNAPSHOT_FILE=/tmp/news.snapshot gunicorn -w 4 -k gthread --threads 32 server:app
+"""
+import os
+import sys
+
+from news_scraper import NewsScraperApp
+from snapshot_store import SNAPSHOT_FILE, SnapshotWriter
+
+# Status, metrics and trends go stale in workers by at most this long
+STATE_INTERVAL = float(os.environ.get('NEWS_COLLECTOR_STATE_INTERVAL', '5'))
+
+
+def main():
+    if not SNAPSHOT_FILE:
+        sys.exit("Set NEWS_SNAPSHOT_FILE to the path web workers will read")
+    scraper = NewsScraperApp()  # No UI (root is None)
+    writer = SnapshotWriter(SNAPSHOT_FILE)
+    # Wake on every published snapshot, or every STATE_INTERVAL otherwise
+    updates = scraper.broadcaster.subscribe()
+    print(f"Collector publishing snapshots to {SNAPSHOT_FILE}")
+    try:
+        while True:
+            updates.next_frame(timeout=STATE_INTERVAL)
+            snapshot = scraper.snapshot
+            if snapshot is not None:
+                writer.write(snapshot, scraper.shared_state())
+    except KeyboardInterrupt:
+        scraper.scheduler.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+import os
+import sqlite3
+import threading
+import time
+
+# SQLite history of every headline and its sentiment score. WAL mode lets
+# HTTP handlers read while the fetcher writes one batch per refresh cycle.
+HISTORY_DB = os.environ.get('NEWS_HISTORY_DB', 'news_history.db')  # '' disables
+HISTORY_RETENTION_DAYS = float(os.environ.get('NEWS_HISTORY_RETENTION_DAYS', '30'))
+COMPACT_INTERVAL = 60 * 60  # seconds between retention passes
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS headlines (
+    id INTEGER PRIMARY KEY,
+    city TEXT NOT NULL,
+    link TEXT NOT NULL,
+    headline TEXT NOT NULL,
+    source TEXT,
+    published_at REAL NOT NULL,
+    sentiment INTEGER,
+    scored_at REAL,
+    first_seen REAL NOT NULL,
+    UNIQUE (city, link)
+);
+CREATE INDEX IF NOT EXISTS idx_headlines_city_published
+    ON headlines (city, published_at, sentiment);
+CREATE INDEX IF NOT EXISTS idx_headlines_city_scored
+    ON headlines (city, scored_at);
+"""
+
+# New rows keep their first_seen; re-seen rows only gain a score they lacked
+UPSERT = """
+INSERT INTO headlines (city, link, headline, source, published_at,
+                       sentiment, scored_at, first_seen)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (city, link) DO UPDATE SET
+    sentiment = COALESCE(headlines.sentiment, excluded.sentiment),
+    scored_at = COALESCE(headlines.scored_at, excluded.scored_at)
+"""
+
+
+class HistoryStore:
+    """Persistent, indexed store of headlines and sentiment scores"""
+    def __init__(self, path=HISTORY_DB, retention_days=HISTORY_RETENTION_DAYS):
+        self.path = path
+        self.retention = retention_days * 24 * 60 * 60
+        self._write_lock = threading.Lock()
+        self._local = threading.local()  # One read connection per thread
+        self._last_compact = 0.0
+
+        self._writer = self._connect()
+        # auto_vacuum only takes effect before the first table is created
+        self._writer.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._writer.executescript(SCHEMA)
+        self._writer.commit()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def _reader(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def record(self, city_items, now=None):
+        """Insert one refresh cycle's items in a single transaction.
+
+        `city_items` maps city -> items shaped like news_scraper.NewsItem:
+        tuples starting with (headline, source, published_at, link, sentiment).
+        """
+        now = now or time.time()
+        rows = []
+        for city, news_items in city_items.items():
+            for item in news_items:
+                headline, source, published_at, link, sentiment = item[:5]
+                rows.append((city, link, headline, source, published_at, sentiment,
+                             now if sentiment is not None else None, now))
+        if not rows:
+            return 0
+        with self._write_lock:
+            with self._writer:
+                self._writer.executemany(UPSERT, rows)
+        if now - self._last_compact >= COMPACT_INTERVAL:
+            self.compact(now)
+        return len(rows)
+
+    def compact(self, now=None):
+        """Drop rows past the retention window and give the space back"""
+        now = now or time.time()
+        self._last_compact = now
+        with self._write_lock:
+            with self._writer:
+                deleted = self._writer.execute(
+                    "DELETE FROM headlines WHERE published_at < ?",
+                    (now - self.retention,)).rowcount
+            self._writer.execute("PRAGMA incremental_vacuum")
+            self._writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        if deleted:
+            print(f"History compaction removed {deleted} rows")
+        return deleted
+
+    def recent_items(self, city, since, limit=100):
+        """Newest stored items for a city published after `since`"""
+        rows = self._reader().execute(
+            "SELECT headline, source, published_at, link, sentiment FROM headlines "
+            "WHERE city = ? AND published_at >= ? ORDER BY published_at DESC LIMIT ?",
+            (city, since, limit)).fetchall()
+        return [{'headline': headline, 'source': source, 'published_at': published_at,
+                 'link': link, 'sentiment': sentiment}
+                for headline, source, published_at, link, sentiment in rows]
+
+    def sentiment_trend(self, city, since, bucket_seconds=3600):
+        """[(bucket_start, mean score, count)] of scored headlines since `since`"""
+        return self._reader().execute(
+            "SELECT CAST(published_at / ? AS INTEGER) * ? AS bucket, "
+            "AVG(sentiment), COUNT(*) FROM headlines "
+            "WHERE city = ? AND published_at >= ? AND sentiment IS NOT NULL "
+            "GROUP BY bucket ORDER BY bucket",
+            (bucket_seconds, bucket_seconds, city, since)).fetchall()
+
+    def scores_since(self, city, since):
+        """[(scored_at, score)] for a city in scoring order, for rebuilding trends"""
+        return self._reader().execute(
+            "SELECT scored_at, sentiment FROM headlines "
+            "WHERE city = ? AND scored_at >= ? ORDER BY scored_at",
+            (city, since)).fetchall()
+
+    def count(self):
+        return self._reader().execute("SELECT COUNT(*) FROM headlines").fetchone()[0]
+
+    def close(self):
+        with self._write_lock:
+            self._writer.close()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
@@ -0,0 +1,165 @@
+import json
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+
+# Per-item log lines: 'sampled' writes one JSON line for a random
+# NEWS_ITEM_LOG_RATE share of items, 'all' prints every item as before,
+# 'off' drops them. Metrics are always collected.
+ITEM_LOG_MODE = os.environ.get('NEWS_ITEM_LOG', 'sampled')
+ITEM_LOG_RATE = float(os.environ.get('NEWS_ITEM_LOG_RATE', '0.01'))
+
+# Latency buckets in seconds, from a single item build up to a slow LLM call
+DEFAULT_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _format_labels(key, extra=None):
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+    kind = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (Prometheus semantics)"""
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}  # label key -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, **labels):
+        return _Span(self, labels)
+
+    def samples(self):
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        rows = []
+        for key, series in snapshot.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series[:-1]):
+                cumulative += count
+                rows.append((self.name + '_bucket', key, cumulative, ('le', bound)))
+            rows.append((self.name + '_count', key, cumulative))
+            rows.append((self.name + '_sum', key, series[-1]))
+        return rows
+
+
+class _Span:
+    """Context manager that observes its wall time into a histogram"""
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Process-wide counters and histograms, rendered as Prometheus text"""
+    def __init__(self, prefix='news_'):
+        self.prefix = prefix
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = cls(self.prefix + name, help_text, **kwargs)
+        return metric
+
+    def counter(self, name, help_text=''):
+        return self._get(Counter, name, help_text)
+
+    def histogram(self, name, help_text='', buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def span(self, name, **labels):
+        """Time a block into the `<name>_seconds` histogram"""
+        return self.histogram(name + '_seconds', f"Duration of {name.replace('_', ' ')}").time(**labels)
+
+    def render(self, collected=()):
+        """Prometheus text format; `collected` adds (name, kind, help, [(labels, value)]) gauges"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for row in metric.samples():
+                name, key, value = row[:3]
+                lines.append(f"{name}{_format_labels(key, row[3] if len(row) > 3 else None)} "
+                             f"{_format_value(value)}")
+        for name, kind, help_text, samples in collected:
+            name = self.prefix + name
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(_label_key(labels))} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = MetricsRegistry()
+
+
+def log_item(event, message, **fields):
+    """Per-item log line, subject to NEWS_ITEM_LOG (see above)"""
+    if ITEM_LOG_MODE == 'all':
+        print(message)
+    elif ITEM_LOG_MODE == 'sampled' and random.random() < ITEM_LOG_RATE:
+        print(json.dumps(dict(ts=round(time.time(), 3), event=event, **fields),
+                         ensure_ascii=False))
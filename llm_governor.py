@@ -0,0 +1,277 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from instrumentation import METRICS
+
+# Budget for the chat endpoint (0 disables a limit). OpenRouter's free
+# models allow about 20 requests per minute.
+LLM_REQUESTS_PER_MINUTE = float(os.environ.get('NEWS_LLM_RPM', '20'))
+LLM_TOKENS_PER_MINUTE = float(os.environ.get('NEWS_LLM_TPM', '40000'))
+LLM_MAX_QUEUE_WAIT = 10  # seconds a call may wait for budget before giving up
+LLM_MAX_RETRIES = 3  # extra attempts after a 429/5xx/connection error
+LLM_RETRY_BASE = 1.0  # seconds, doubled per attempt (full jitter)
+LLM_RETRY_MAX = 20  # cap of a single backoff delay, also for Retry-After
+LLM_DEADLINE = 60  # seconds a call may spend including retries
+BREAKER_FAILURES = 5  # consecutive failed calls that open the circuit
+BREAKER_COOLDOWN = 30  # seconds before a half-open probe is let through
+LAST_GOOD_SIZE = 256  # replies kept per prompt for serving while degraded
+
+
+class LLMUnavailable(RuntimeError):
+    """Raised instead of calling the LLM (circuit open or budget exhausted)"""
+
+
+class TokenBucket:
+    """Per-minute budget that refills continuously; bursts up to one minute"""
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount, max_wait):
+        """Take `amount`, returning how long to wait for it, or None if too long"""
+        if self.rate <= 0:
+            return 0.0
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = max(amount - self.tokens, 0) / self.rate
+            if wait > max_wait:
+                return None
+            # Going negative queues later callers behind this reservation
+            self.tokens -= amount
+            return wait
+
+    def refund(self, amount):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def charge(self, amount):
+        """Account for usage beyond the reservation (never blocks)"""
+        with self._lock:
+            self.tokens -= amount
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures; one probe at a time once cooled down"""
+    def __init__(self, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.threshold = failures
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.cooldown else 'open'
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def release(self):
+        """Give back a probe slot that was not used for an API call"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.threshold:
+                if self.opened_at is None or self._probing:
+                    print(f"LLM circuit open after {self.failures} failures")
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class _Flight:
+    """One in-flight call that identical concurrent prompts wait on"""
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class LLMGovernor:
+    """Rate-limited, coalescing, retrying front of the chat completions API.
+
+    complete() returns the reply text. Identical concurrent prompts share
+    one request. Calls wait at most LLM_MAX_QUEUE_WAIT for the request and
+    token budget. 429/5xx/connection errors are retried with jittered
+    exponential backoff within LLM_DEADLINE. After BREAKER_FAILURES failed
+    calls the circuit opens. While it is open, the last good reply for the
+    same prompt is served if there is one; otherwise LLMUnavailable is
+    raised at once instead of waiting on a failing API.
+    """
+    def __init__(self, client_factory, requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=LLM_TOKENS_PER_MINUTE, max_retries=LLM_MAX_RETRIES):
+        self.client_factory = client_factory
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.breaker = CircuitBreaker()
+        self.last_good = OrderedDict()  # prompt key -> reply text, LRU order
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.counters = dict.fromkeys(
+            ('calls', 'requests', 'coalesced', 'retries', 'throttled', 'failures',
+             'rejected', 'served_stale'), 0)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    @staticmethod
+    def prompt_key(model, messages):
+        return hashlib.sha1(json.dumps([model, messages], sort_keys=True)
+                            .encode('utf-8')).hexdigest()
+
+    def complete(self, model, messages, tokens=None):
+        """Reply text for a chat prompt; `tokens` estimates prompt + completion size"""
+        self._count('calls')
+        key = self.prompt_key(model, messages)
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.counters['coalesced'] += 1
+        if not leader:
+            if not flight.done.wait(LLM_DEADLINE + LLM_MAX_QUEUE_WAIT):
+                raise LLMUnavailable("timed out waiting for an identical request")
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._complete(key, model, messages, tokens)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _complete(self, key, model, messages, tokens):
+        if not self.breaker.allow():
+            return self._stale(key, "circuit open")
+        if tokens is None:
+            tokens = sum(len(message.get('content', '')) for message in messages) // 4
+
+        wait = self.request_bucket.reserve(1, LLM_MAX_QUEUE_WAIT)
+        token_wait = None if wait is None else self.token_bucket.reserve(tokens, LLM_MAX_QUEUE_WAIT)
+        if token_wait is None:
+            if wait is not None:
+                self.request_bucket.refund(1)
+            self._count('throttled')
+            # Not the API's fault, so the breaker only gets its probe back
+            self.breaker.release()
+            return self._stale(key, "request budget exhausted")
+        time.sleep(max(wait, token_wait))
+
+        deadline = time.monotonic() + LLM_DEADLINE
+        attempt = 0
+        while True:
+            try:
+                self._count('requests')
+                with METRICS.span('llm_request'):
+                    response = self.client_factory().chat.completions.create(
+                        model=model, messages=messages)
+                break
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if (delay is None or attempt >= self.max_retries
+                        or time.monotonic() + delay > deadline):
+                    self._count('failures')
+                    self.breaker.record_failure()
+                    stale = self._last_good(key)
+                    if stale is not None:
+                        print(f"LLM call failed ({e}), serving last good reply")
+                        self._count('served_stale')
+                        return stale
+                    raise
+                attempt += 1
+                self._count('retries')
+                print(f"LLM call failed ({e}), retry {attempt} in {delay:.1f}s")
+                time.sleep(delay)
+                # Every attempt counts against the request budget
+                self.request_bucket.charge(1)
+
+        self.breaker.record_success()
+        usage = getattr(response, 'usage', None)
+        used = getattr(usage, 'total_tokens', None)
+        if isinstance(used, int) and used > tokens:
+            self.token_bucket.charge(used - tokens)
+        content = response.choices[0].message.content
+        with self._lock:
+            self.last_good[key] = content
+            self.last_good.move_to_end(key)
+            if len(self.last_good) > LAST_GOOD_SIZE:
+                self.last_good.popitem(last=False)
+        return content
+
+    def _last_good(self, key):
+        with self._lock:
+            return self.last_good.get(key)
+
+    def _stale(self, key, reason):
+        stale = self._last_good(key)
+        if stale is None:
+            self._count('rejected')
+            raise LLMUnavailable(reason)
+        self._count('served_stale')
+        return stale
+
+    @staticmethod
+    def _retry_delay(error, attempt):
+        """Backoff before retrying `error`, or None if it is not retryable"""
+        status = getattr(error, 'status_code', None)
+        if status is None:
+            from openai import APIConnectionError  # Also covers timeouts
+            if not isinstance(error, APIConnectionError):
+                return None
+        elif status != 429 and status < 500:
+            return None
+        delay = random.uniform(0, min(LLM_RETRY_BASE * 2 ** attempt, LLM_RETRY_MAX))
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        try:
+            delay = max(delay, min(float(retry_after), LLM_RETRY_MAX))
+        except (TypeError, ValueError):
+            pass
+        return delay
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats['in_flight'] = len(self._flights)
+        stats['circuit'] = self.breaker.state
+        return stats
@@ -1,65 +1,926 @@
-import tkinter as tk
-from tkinter import ttk, scrolledtext
 import threading
 import time
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-import chromedriver_autoinstaller
 import os
+import re
+import sys
+import json
+import hashlib
+import calendar
+import functools
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
 import xml.etree.ElementTree as ET
 import requests
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 import pytz
-from openai import OpenAI
 from requests.utils import requote_uri
+import sqlite3
+from history_store import HistoryStore, HISTORY_DB
+from sentiment_series import SentimentSeries, parse_windows
+from refresh_scheduler import RefreshScheduler
+from llm_governor import LLMGovernor
+from instrumentation import METRICS, log_item
+from story_clusters import StoryClusterIndex
+from snapshot_store import NewsSnapshot, SnapshotBroadcaster, SnapshotDeltas, TREND_POINTS
+
+# tkinter, selenium/chromedriver_autoinstaller and openai are imported lazily
+# where they are first needed, so headless start-up stays fast and light.
+
+# Sentiment cache bounds: entries are tiny, the TTL only guards against a
+# stale label surviving an unchanged feed for too long.
+SENTIMENT_CACHE_SIZE = 256
+SENTIMENT_CACHE_TTL = 15 * 60  # seconds
+
+# Per-headline sentiment: scores are remembered by item link so each
+# headline is sent to the LLM once, then aggregated per city.
+ITEM_SCORE_CACHE_SIZE = 20000
+ITEM_SCORE_TTL = 24 * 60 * 60  # seconds
+# Pending headlines from all cities are packed into as few scoring requests
+# as this prompt-token budget allows (estimated at ~4 characters per token).
+SCORE_TOKEN_BUDGET = int(os.environ.get('NEWS_SCORE_TOKEN_BUDGET', '2000'))
+SCORE_MAX_BATCH = 100  # headlines per scoring request
+SENTIMENT_HALF_LIFE = 30 * 60  # seconds, recency weighting of item scores
+SENTIMENT_LABELS = ["Very Negative", "Negative", "Neutral", "Positive", "Very Positive"]
+SENTIMENT_MODEL = "nvidia/llama-3.1-nemotron-70b-instruct:free"
+LLM_TIMEOUT = 30  # seconds before a scoring request counts as failed
+
+# Which sentiment backend scores headlines (NEWS_SENTIMENT_BACKEND):
+#   'llm'     - OpenRouter, with the local lexicon as fallback (default)
+#   'hybrid'  - lexicon first, only ambiguous headlines go to the LLM
+#   'lexicon' - local lexicon only, no network at all
+SENTIMENT_BACKEND = os.environ.get('NEWS_SENTIMENT_BACKEND', 'llm')
+LEXICON_CONFIDENCE = 1.0  # |polarity| the hybrid mode accepts without the LLM
+
+# Weighted news-domain lexicon for the local scorer, roughly -2..+2
+DEFAULT_LEXICON = {
+    # Negative
+    'killed': -2.0, 'dead': -2.0, 'death': -1.8, 'deaths': -1.8, 'dies': -1.8,
+    'murder': -2.0, 'murdered': -2.0, 'rape': -2.0, 'suicide': -2.0, 'blast': -2.0,
+    'attack': -1.6, 'attacked': -1.6, 'terror': -2.0, 'riot': -1.8, 'riots': -1.8,
+    'violence': -1.6, 'clash': -1.2, 'clashes': -1.2, 'crash': -1.6, 'accident': -1.4,
+    'collapse': -1.6, 'collapses': -1.6, 'fire': -1.2, 'blaze': -1.4, 'flood': -1.4,
+    'floods': -1.4, 'flooding': -1.4, 'waterlogging': -1.0, 'landslide': -1.6,
+    'injured': -1.4, 'injuries': -1.2, 'victim': -1.2, 'victims': -1.2,
+    'arrested': -1.0, 'arrest': -1.0, 'held': -0.6, 'booked': -0.8, 'fraud': -1.4,
+    'scam': -1.4, 'cheated': -1.2, 'theft': -1.0, 'robbery': -1.2, 'bribe': -1.2,
+    'corruption': -1.4, 'protest': -0.8, 'protests': -0.8, 'strike': -0.8,
+    'shutdown': -1.0, 'outage': -1.0, 'disrupted': -0.8, 'delays': -0.6,
+    'delayed': -0.6, 'jam': -0.6, 'pollution': -1.0, 'polluted': -1.0, 'smog': -1.0,
+    'toxic': -1.2, 'crisis': -1.4, 'shortage': -1.0, 'loss': -1.0, 'losses': -1.0,
+    'fall': -0.6, 'falls': -0.6, 'slump': -1.2, 'decline': -0.8, 'plunge': -1.4,
+    'ban': -0.6, 'fine': -0.4, 'fined': -0.8, 'warning': -0.8, 'alert': -0.6,
+    'fear': -1.0, 'fears': -1.0, 'panic': -1.2, 'dispute': -0.8, 'row': -0.6,
+    'slams': -0.8, 'illegal': -1.0, 'harassment': -1.6, 'assault': -1.6,
+    'stabbed': -1.8, 'shot': -1.6, 'missing': -1.0, 'outbreak': -1.4,
+    # Positive
+    'win': 1.4, 'wins': 1.4, 'won': 1.4, 'victory': 1.6, 'award': 1.4,
+    'awards': 1.4, 'honoured': 1.2, 'celebrates': 1.4, 'celebration': 1.2,
+    'festival': 0.8, 'launch': 0.8, 'launches': 0.8, 'launched': 0.8,
+    'inaugurates': 1.0, 'inaugurated': 1.0, 'opens': 0.6, 'new': 0.2,
+    'growth': 1.2, 'grows': 1.0, 'boost': 1.2, 'boosts': 1.2, 'record': 0.8,
+    'rise': 0.6, 'rises': 0.6, 'gains': 1.0, 'surge': 0.8, 'profit': 1.0,
+    'investment': 1.0, 'jobs': 0.8, 'hiring': 0.8, 'success': 1.4,
+    'successful': 1.4, 'relief': 1.2, 'rescued': 1.2, 'rescue': 0.8,
+    'recovers': 1.0, 'recovery': 1.0, 'improves': 1.0, 'improved': 1.0,
+    'upgrade': 0.8, 'approved': 0.8, 'approves': 0.8, 'clean': 0.6,
+    'safe': 0.8, 'safer': 1.0, 'free': 0.4, 'help': 0.6, 'helps': 0.6,
+    'support': 0.6, 'praised': 1.2, 'praise': 1.0, 'best': 1.0, 'first': 0.2,
+    'historic': 0.8, 'innovative': 1.0, 'green': 0.6, 'donates': 1.2,
+}
+TOKEN_PATTERN = re.compile(r"[a-z]+")
+
+# On start-up the cache is warmed from stored history this far back
+# (the feeds themselves only cover the last hour)
+HISTORY_WARM_WINDOW = 60 * 60  # seconds
+HISTORY_WARM_LIMIT = 100  # items per city
+
+# Default city registry. Override with a JSON file pointed to by
+# NEWS_CITIES_FILE, mapping city name to either a feed URL or an object
+# such as {"url": "...", "timeout": 10, "backend": "browser"}. The
+# "browser" backend loads the feed in headless Chrome, which is only
+# started when such a feed is first fetched.
+DEFAULT_CITY_FEEDS = {
+    'Bangalore': "https://news.google.com/rss/search?q=bangalore+OR+bengaluru+when:1h&hl=en-IN&gl=IN&ceid=IN:en",
+    'Mumbai': "https://news.google.com/rss/search?q=mumbai+when:1h&hl=en-IN&gl=IN&ceid=IN:en",
+    'Delhi': "https://news.google.com/rss/search?q=delhi+when:1h&hl=en-IN&gl=IN&ceid=IN:en"
+}
+
+# Fetch engine sizing: one pooled keep-alive session shared by a bounded
+# worker pool, so a refresh cycle takes about as long as the slowest feed.
+FETCH_WORKERS = int(os.environ.get('NEWS_FETCH_WORKERS', '8'))
+FEED_TIMEOUT = 15  # seconds per city (connect + read)
+CYCLE_TIMEOUT = 60  # seconds before a refresh cycle stops waiting
+
+# RSS parsing. Google News dates are RFC-822 in GMT and the display zone
+# is fixed, so it is looked up once rather than per item.
+DISPLAY_TZ = pytz.timezone('Asia/Kolkata')
+RSS_CHUNK_SIZE = 64 * 1024  # bytes fed to the streaming parser at a time
+_MONTHS = {name: number for number, name in enumerate(
+    ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+     'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'], 1)}
+_ZONE_OFFSETS = {'GMT': 0, 'UTC': 0, 'UT': 0, 'Z': 0}
+
+# Hot-path metrics, resolved once (see instrumentation.py and /metrics)
+ITEM_BUILD = METRICS.histogram('item_build_seconds', "Time to build one news item")
+ITEMS_PROCESSED = METRICS.counter('items_processed_total', "News items parsed from feeds")
+ITEMS_INVALID = METRICS.counter('items_invalid_total', "Feed items without title or link")
+FETCH_ERRORS = METRICS.counter('fetch_errors_total', "Failed feed fetches")
+FEED_FETCHES = METRICS.counter('feed_fetches_total', "Feed fetches by outcome")
+HEADLINES_SCORED = METRICS.counter('headlines_scored_total', "Newly scored headlines")
+
+
+def load_city_registry(path=None):
+    """Load the city -> feed config registry, falling back to the defaults"""
+    path = path or os.environ.get('NEWS_CITIES_FILE')
+    raw = DEFAULT_CITY_FEEDS
+    if path:
+        try:
+            with open(path, encoding='utf-8') as f:
+                raw = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not load city registry {path}: {e}, using defaults")
+            raw = DEFAULT_CITY_FEEDS
+
+    registry = {}
+    for city, entry in raw.items():
+        if isinstance(entry, str):
+            entry = {'url': entry}
+        entry = dict(entry)
+        entry.setdefault('timeout', FEED_TIMEOUT)
+        entry.setdefault('backend', 'requests')
+        registry[city] = entry
+    return registry
+
+
+def create_http_session(pool_size=FETCH_WORKERS):
+    """Shared keep-alive session sized for the fetch worker pool"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'User-Agent': 'Mozilla/5.0'})
+    return session
+
+
+def parse_rfc822_epoch(value):
+    """Epoch seconds for an RFC-822 date, or None if it cannot be parsed"""
+    # Fast path for the 'Sat, 18 Oct 2025 10:00:00 GMT' shape Google uses
+    try:
+        parts = value.split()
+        if parts[0].endswith(','):
+            parts = parts[1:]
+        day, month, year = int(parts[0]), _MONTHS[parts[1][:3].title()], int(parts[2])
+        if year < 100:
+            raise ValueError("2-digit year")  # The stdlib maps these to 19xx/20xx
+        clock = parts[3].split(':')
+        hour, minute = int(clock[0]), int(clock[1])
+        second = int(clock[2]) if len(clock) > 2 else 0
+        zone = parts[4] if len(parts) > 4 else 'GMT'
+        offset = _ZONE_OFFSETS.get(zone)
+        if offset is None:
+            sign = -1 if zone[0] == '-' else 1
+            offset = sign * (int(zone[1:3]) * 3600 + int(zone[3:5]) * 60)
+        return float(calendar.timegm((year, month, day, hour, minute, second)) - offset)
+    except (IndexError, KeyError, ValueError):
+        pass
+    # Anything unusual goes through the stdlib parser
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+# '%I:%M %p' for every minute of the day
+_MINUTE_LABELS = tuple(f"{(minute // 60) % 12 or 12:02d}:{minute % 60:02d} "
+                       f"{'AM' if minute < 720 else 'PM'}" for minute in range(24 * 60))
+
+
+@functools.lru_cache(maxsize=4096)
+def _utc_offset_minutes(epoch_hour):
+    """DISPLAY_TZ offset during an epoch hour (zones change offset on the hour)"""
+    offset = datetime.fromtimestamp(epoch_hour * 3600, DISPLAY_TZ).utcoffset()
+    return int(offset.total_seconds() // 60)
+
+
+def _clock_label(epoch_minute):
+    """'%I:%M %p' in DISPLAY_TZ for an epoch minute, without datetime formatting"""
+    return _MINUTE_LABELS[(epoch_minute + _utc_offset_minutes(epoch_minute // 60)) % (24 * 60)]
+
+
+class NewsItem(namedtuple('NewsItem', 'headline source published_at link sentiment cluster',
+                          defaults=(None, None))):
+    """Immutable headline with its epoch publish time, optional 1-5 score
+    and optional story cluster id (shared by near-identical headlines).
+
+    Display strings are derived from published_at when serialized and
+    source names are interned, so large caches stay small and can be
+    shared between threads without copying.
+    """
+    __slots__ = ()
+
+    def __new__(cls, headline, source, published_at, link, sentiment=None, cluster=None):
+        return super().__new__(cls, headline, sys.intern(source), published_at, link,
+                               sentiment, cluster)
+
+    @property
+    def timestamp(self):
+        return _clock_label(int(self.published_at // 60))
+
+    @property
+    def subheading(self):
+        return f"Published at {self.timestamp}"
+
+    def with_sentiment(self, score):
+        return self._replace(sentiment=score)
+
+    def with_cluster(self, cluster):
+        return self._replace(cluster=cluster)
+
+    def to_json(self):
+        """The item shape /news-data clients expect"""
+        timestamp = _clock_label(int(self.published_at // 60))
+        data = {
+            'headline': self.headline,
+            'source': self.source,
+            'subheading': f"Published at {timestamp}",
+            'timestamp': timestamp,
+            'published_at': self.published_at,
+            'link': self.link
+        }
+        if self.sentiment is not None:
+            data['sentiment'] = self.sentiment
+        if self.cluster is not None:
+            data['cluster'] = self.cluster
+        return data
+
+
+def _build_news_item(element, seen_ids):
+    """NewsItem for one <item> element, None if invalid or a duplicate"""
+    fields = {child.tag: child.text for child in element}  # One pass over children
+    title, link = fields.get('title'), fields.get('link')
+    if not title or not link:
+        ITEMS_INVALID.inc()
+        log_item('item_invalid', "Error processing item: missing title or link")
+        return None
+
+    # Deduplicate on guid/link; the same story is often listed twice
+    item_id = (fields.get('guid') or link).strip()
+    if item_id in seen_ids:
+        return None
+    seen_ids.add(item_id)
+
+    published_at = parse_rfc822_epoch(fields.get('pubDate') or '')
+    if published_at is None:
+        published_at = time.time()
+    return NewsItem(title.strip(), (fields.get('source') or "Unknown Source").strip(),
+                    published_at, link.strip())
+
+
+def iter_rss_items(source, chunk_size=RSS_CHUNK_SIZE):
+    """Stream NewsItems out of RSS XML.
+
+    `source` is the raw bytes/str or any iterable of byte chunks (for example
+    response.iter_content()). Each <item> is dropped from the tree as soon as
+    it is emitted, so memory stays flat however long the feed is. Items
+    repeating an earlier guid/link are skipped. Raises ET.ParseError on
+    malformed XML.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        view = memoryview(source)
+        chunks = (view[i:i + chunk_size] for i in range(0, len(view), chunk_size))
+    elif isinstance(source, str):
+        chunks = (source,)
+    else:
+        chunks = source
+
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    state = {'channel': None, 'seen': set()}
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from _drain_rss_events(parser, state)
+    parser.close()
+    yield from _drain_rss_events(parser, state)
+
+
+def _drain_rss_events(parser, state):
+    for event, element in parser.read_events():
+        if event == 'start':
+            if element.tag == 'channel':
+                state['channel'] = element
+            continue
+        if element.tag != 'item':
+            continue
+        started = time.perf_counter()
+        item = _build_news_item(element, state['seen'])
+        ITEM_BUILD.observe(time.perf_counter() - started)
+        element.clear()
+        if state['channel'] is not None:
+            state['channel'].remove(element)  # Emitted items are its last child
+        if item is not None:
+            yield item
+
+
+class FetchResult:
+    """Minimal response shape shared by the fetch backends"""
+    __slots__ = ('status_code', 'headers', 'content')
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+
+class RequestsFetchBackend:
+    """Plain HTTP over the shared keep-alive session (the default backend)"""
+    def __init__(self, session):
+        self.session = session
+
+    def fetch(self, url, headers, timeout):
+        response = self.session.get(url, headers=headers, timeout=timeout)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return FetchResult(response.status_code, response.headers, response.content)
+
+
+class BrowserFetchBackend:
+    """Headless Chrome, started on first use and shared by all browser feeds"""
+    def __init__(self, app, fallback):
+        self.app = app
+        self.fallback = fallback
+        self._lock = threading.Lock()  # One driver, one page load at a time
+
+    def fetch(self, url, headers, timeout):
+        with self._lock:
+            driver = self.app.get_driver()
+            if driver is None:
+                # Chrome is unavailable; plain requests is better than nothing
+                return self.fallback.fetch(url, headers, timeout)
+            driver.set_page_load_timeout(timeout)
+            driver.get(url)
+            return FetchResult(200, {}, driver.page_source.encode('utf-8'))
+
+
+class SentimentCache:
+    """Thread-safe LRU cache of sentiment labels keyed by headline-set hash"""
+    def __init__(self, max_entries=SENTIMENT_CACHE_SIZE, ttl=SENTIMENT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(city, headlines):
+        """Stable hash of a city's headline set (order-insensitive)"""
+        digest = hashlib.sha1(city.encode('utf-8'))
+        for headline in sorted(headlines):
+            digest.update(b'\0')
+            digest.update(headline.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached value or None on a miss/expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if time.monotonic() - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+class SentimentBackend:
+    """Interface for headline sentiment scorers.
+
+    score() takes (city, headline) pairs and returns {index: score} on the
+    1-5 scale for the entries it could score. Missing entries are left to
+    the next backend.
+    """
+    name = 'base'
+
+    def score(self, entries):
+        raise NotImplementedError
+
+
+class OpenRouterSentimentBackend(SentimentBackend):
+    """Remote LLM scoring, packed into token-budgeted JSON batches"""
+    name = 'openrouter'
+
+    def __init__(self, client_factory, model=SENTIMENT_MODEL,
+                 token_budget=SCORE_TOKEN_BUDGET, max_batch=SCORE_MAX_BATCH, governor=None):
+        self.client_factory = client_factory  # The app builds its client lazily
+        # Every request goes through the governor's budget, retries and breaker
+        self.governor = governor or LLMGovernor(client_factory)
+        self.model = model
+        self.token_budget = token_budget
+        self.max_batch = max_batch
+        self.last_error = None
+
+    def score(self, entries):
+        results = {}
+        for batch in self._pack_batches(list(enumerate(entries))):
+            try:
+                results.update(self._score_batch(batch))
+            except Exception as e:
+                # The API itself failed; leave the rest to the fallback
+                self.last_error = e
+                print(f"LLM scoring failed for {len(batch)} headlines: {e}")
+                break
+        return results
+
+    def _pack_batches(self, indexed):
+        """Split (index, (city, headline)) pairs into batches within the token budget"""
+        batch, batch_tokens = [], 0
+        for index, (city, headline) in indexed:
+            tokens = (len(city) + len(headline)) // 4 + 8
+            if batch and (batch_tokens + tokens > self.token_budget
+                          or len(batch) >= self.max_batch):
+                yield batch
+                batch, batch_tokens = [], 0
+            batch.append((index, (city, headline)))
+            batch_tokens += tokens
+        if batch:
+            yield batch
+
+    def _score_batch(self, batch):
+        """Score one batch, retrying in halves when the output is malformed"""
+        try:
+            scores = self._request_scores([entry for _, entry in batch])
+        except ValueError as e:
+            print(f"Malformed scoring response for {len(batch)} headlines: {e}")
+            scores = {}
+
+        results = {batch[position][0]: score for position, score in scores.items()}
+        missing = [pair for pair in batch if pair[0] not in results]
+        if missing and len(batch) > 1:
+            middle = (len(missing) + 1) // 2
+            for part in (missing[:middle], missing[middle:]):
+                if part:
+                    results.update(self._score_batch(part))
+        return results
+
+    def _request_scores(self, entries):
+        """Ask the LLM for a JSON array of scores, returns {position: score}"""
+        numbered = "\n".join(f"{i}. [{city}] {headline}"
+                             for i, (city, headline) in enumerate(entries, 1))
+        scoring_prompt = f"""Rate the sentiment of each numbered Indian city news headline. Rules:
+1. Use this scale:
+   - 1: Very Negative
+   - 2: Negative
+   - 3: Neutral
+   - 4: Positive
+   - 5: Very Positive
+2. Reply with ONLY a JSON array containing one object per headline, e.g.
+   [{{"id": 1, "score": 3}}, {{"id": 2, "score": 5}}]
+3. No additional text or formatting
+
+Headlines:
+{numbered}"""
+
+        # Prompt tokens plus roughly a dozen output tokens per headline
+        content = self.governor.complete(
+            self.model,
+            [{
+                "role": "user",
+                "content": scoring_prompt
+            }],
+            tokens=len(scoring_prompt) // 4 + 12 * len(entries)
+        )
+        return self.parse_scores(content, len(entries))
+
+    @staticmethod
+    def parse_scores(content, batch_size):
+        """Validate a JSON score array, raises ValueError if it is unusable"""
+        content = content or ""
+        start, end = content.find('['), content.rfind(']')
+        if start == -1 or end < start:
+            raise ValueError("no JSON array in response")
+        rows = json.loads(content[start:end + 1])  # JSONDecodeError is a ValueError
+        if not isinstance(rows, list):
+            raise ValueError("response is not a JSON array")
+
+        scores = {}
+        for row in rows:
+            if not isinstance(row, dict):
+                continue
+            try:
+                index, score = int(row['id']) - 1, int(row['score'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if 0 <= index < batch_size and 1 <= score <= 5:
+                scores[index] = score
+        if not scores:
+            raise ValueError("no valid scores in response")
+        return scores
+
+
+class LexiconSentimentBackend(SentimentBackend):
+    """Local weighted-token scorer, vectorized with NumPy.
+
+    Each batch is tokenized once into (row, column) pairs against the
+    lexicon vocabulary. Per-headline sums and match counts then come from
+    two bincounts. Polarity is the sum over sqrt(matches), mapped to 1-5
+    around the neutral 3.
+    """
+    name = 'lexicon'
+
+    def __init__(self, lexicon=None):
+        import numpy as np
+        self._np = np
+        lexicon = lexicon or DEFAULT_LEXICON
+        self.vocabulary = {word: column for column, word in enumerate(lexicon)}
+        self.weights = np.fromiter(lexicon.values(), dtype=np.float64, count=len(lexicon))
+
+    def polarity(self, headlines):
+        """(polarity, matched token count) arrays for a batch of headlines"""
+        np = self._np
+        rows, columns = [], []
+        vocabulary = self.vocabulary
+        for row, headline in enumerate(headlines):
+            for token in TOKEN_PATTERN.findall(headline.lower()):
+                column = vocabulary.get(token)
+                if column is not None:
+                    rows.append(row)
+                    columns.append(column)
+        rows = np.asarray(rows, dtype=np.intp)
+        totals = np.bincount(rows, weights=self.weights[np.asarray(columns, dtype=np.intp)],
+                             minlength=len(headlines))
+        counts = np.bincount(rows, minlength=len(headlines))
+        return totals / np.sqrt(np.maximum(counts, 1)), counts
+
+    def score(self, entries, min_confidence=0.0):
+        """Score every entry, or only those with |polarity| >= min_confidence"""
+        np = self._np
+        if not entries:
+            return {}
+        polarity, counts = self.polarity([headline for _, headline in entries])
+        scores = np.clip(np.rint(3 + polarity), 1, 5).astype(int)
+        if min_confidence <= 0:
+            return dict(enumerate(scores.tolist()))
+        confident = np.flatnonzero((counts > 0) & (np.abs(polarity) >= min_confidence))
+        return {int(i): int(scores[i]) for i in confident}
+
 
 class NewsScraperApp:
     def __init__(self, root=None):
         self.root = root
         self.ready = threading.Event()  # Thread-safe ready flag
+        # Chrome is only started by the browser backend when a feed needs it
         self.driver = None
+        self._driver_lock = threading.Lock()
+        self._driver_attempted = False
         
-        # Start Chrome setup immediately
-        self.chrome_thread = threading.Thread(target=self.initialize_chrome)
-        self.chrome_thread.start()
+        # RSS feeds come from the configurable city registry
+        self.city_feeds = load_city_registry()
+        self.news_urls = {city: feed['url'] for city, feed in self.city_feeds.items()}
+        
+        # Pooled HTTP session and bounded worker pool for concurrent fetches
+        self.session = create_http_session()
+        self.fetch_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS,
+                                             thread_name_prefix='news-fetch')
+        # Per-feed HTTP validators and body hash from the last good fetch
+        self.feed_state = {}
+        # Outcome of each city's last fetch and its pool future while running
+        self.feed_status = {}
+        self._inflight = {}
+        requests_backend = RequestsFetchBackend(self.session)
+        self.fetch_backends = {
+            'requests': requests_backend,
+            'browser': BrowserFetchBackend(self, fallback=requests_backend)
+        }
         
         if self.root:  # Only setup GUI if root exists
             self.root.title("India Metro News Hub")
             self.root.geometry("1500x800")
             self.create_ui()
-            # Schedule auto-refresh only in GUI mode
-            self.root.after(20000, self.auto_refresh)
         
-        # Updated URLs to use RSS feeds
-        self.news_urls = {
-            'Bangalore': "https://news.google.com/rss/search?q=bangalore+OR+bengaluru+when:1h&hl=en-IN&gl=IN&ceid=IN:en",
-            'Mumbai': "https://news.google.com/rss/search?q=mumbai+when:1h&hl=en-IN&gl=IN&ceid=IN:en",
-            'Delhi': "https://news.google.com/rss/search?q=delhi+when:1h&hl=en-IN&gl=IN&ceid=IN:en"
-        }
-        
-        # Initialize OpenAI client
-        self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key="YOUR API",   # Mention your API KEY
-            default_headers={
-                "HTTP-Referer": "http://localhost:5000",
-                "X-Title": "News Analyzer"
-            }
-        )
+        # The OpenAI client is built on first use (see the `client` property);
+        # warm it up in the background while the first feeds download
+        self._client = None
+        self._client_lock = threading.Lock()
+        threading.Thread(target=lambda: self.client, daemon=True).start()
         
         # Initialize news cache BEFORE fetching news
+        # city -> tuple of NewsItems. Tuples are replaced, never mutated, so
+        # readers use them without copying; cache_lock serializes writers.
         self.news_cache = {}
-        # Create a lock for synchronizing cache access
         self.cache_lock = threading.Lock()
+        # Sentiment labels keyed by headline set, so polling an unchanged
+        # feed never goes back to the LLM
+        self.sentiment_cache = SentimentCache()
+        self._headline_keys = {}  # city -> (items list, cache key)
+        self._init_sentiment()
+        # Latest published NewsSnapshot; readers just grab the reference
+        self.snapshot = None
+        self.snapshot_lock = threading.Lock()
+        self._city_fragments = {}  # city -> (items, analysis, ids, hash, JSON bytes, entry)
+        # Item ids and deltas for /news-data?since=<version>
+        self.snapshot_deltas = SnapshotDeltas()
+        # Pushes each new snapshot to /news-stream subscribers
+        self.broadcaster = SnapshotBroadcaster()
+        # Persistent headline/score history; serve it until the network answers
+        self.history = self._open_history()
+        # Rolling per-city sentiment windows, fed as headlines get scored
+        self.trend_windows = parse_windows()
+        self.trends = {city: SentimentSeries(self.trend_windows) for city in self.news_urls}
+        self._trend_links = {}  # city -> links already fed to its series
+        # Groups the same story across feeds and cycles so it is scored once
+        self.story_clusters = StoryClusterIndex()
+        self.warm_from_history()
+        self.ready.set()
         
-        # Start initial fetch now that the cache is ready
-        self.fetch_all_cities()
+        # One scheduler thread runs every refresh (GUI and headless); every
+        # city is due at once, so this is also the initial fetch
+        self.scheduler = RefreshScheduler(self.fetch_cities_concurrently, self.news_urls)
+        self.scheduler.start()
         
+    def _init_sentiment(self):
+        """Per-headline score memory and the sentiment backends"""
+        # Per-headline scores (1-5) keyed by item link
+        self.item_scores = SentimentCache(max_entries=ITEM_SCORE_CACHE_SIZE,
+                                          ttl=ITEM_SCORE_TTL)
+        self.sentiment_mode = SENTIMENT_BACKEND
+        # Rate limits, request coalescing, retries and circuit breaker for the LLM
+        self.llm_governor = LLMGovernor(lambda: self.client)
+        self.llm_backend = OpenRouterSentimentBackend(lambda: self.client,
+                                                      governor=self.llm_governor)
+        self._lexicon_backend = None
+        self._lexicon_lock = threading.Lock()
+
+    @property
+    def lexicon_backend(self):
+        """Local lexicon scorer, built (and numpy imported) on first use"""
+        if self._lexicon_backend is None:
+            with self._lexicon_lock:
+                if self._lexicon_backend is None:
+                    self._lexicon_backend = LexiconSentimentBackend()
+        return self._lexicon_backend
+
+    @property
+    def client(self):
+        """OpenAI client, created (and openai imported) on first use"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import OpenAI
+                    # OPENROUTER_BASE_URL can point it at a local OpenAI-compatible
+                    # endpoint such as benchmarks/fake_openai.py
+                    self._client = OpenAI(
+                        base_url=os.environ.get('OPENROUTER_BASE_URL', "https://openrouter.ai/api/v1"),
+                        api_key=os.environ.get('OPENROUTER_API_KEY', "YOUR API"),   # Mention your API KEY
+                        timeout=LLM_TIMEOUT,
+                        max_retries=0,  # LLMGovernor retries within its own budget
+                        default_headers={
+                            "HTTP-Referer": "http://localhost:5000",
+                            "X-Title": "News Analyzer"
+                        }
+                    )
+        return self._client
+
+    @client.setter
+    def client(self, value):
+        self._client = value
+
+    def _open_history(self):
+        """Open the SQLite history store, or None if disabled/unavailable"""
+        if not HISTORY_DB:
+            return None
+        try:
+            return HistoryStore(HISTORY_DB)
+        except sqlite3.Error as e:
+            print(f"History store unavailable ({HISTORY_DB}): {e}")
+            return None
+
+    def warm_from_history(self):
+        """Fill news_cache (and known scores) from stored history"""
+        if self.history is None:
+            return
+        since = time.time() - HISTORY_WARM_WINDOW
+        city_items = {}
+        for city in self.news_urls.keys():
+            news_items = tuple(NewsItem(row['headline'], row['source'] or "Unknown Source",
+                                        row['published_at'], row['link'], row['sentiment'])
+                               for row in self.history.recent_items(city, since,
+                                                                    HISTORY_WARM_LIMIT))
+            if news_items:
+                city_items[city] = news_items
+            for scored_at, score in self.history.scores_since(
+                    city, time.time() - max(self.trend_windows.values())):
+                self.trends[city].add(score, scored_at)
+        self.cluster_items(city_items)
+        warmed = 0
+        for city, news_items in city_items.items():
+            for item in news_items:
+                if item.sentiment is not None:
+                    self.item_scores.put(self._item_key(item), item.sentiment)
+            with self.cache_lock:
+                self.news_cache[city] = news_items
+            warmed += len(news_items)
+            self._trend_links[city] = {item.link for item in news_items
+                                       if item.sentiment is not None}
+        if warmed:
+            print(f"Warmed news cache with {warmed} items from history")
+            self.publish_snapshot(score_missing=False)
+
+    def record_history(self, city_items):
+        """Persist one refresh cycle's items as a single batch"""
+        if self.history is None or not city_items:
+            return
+        try:
+            self.history.record(city_items)
+        except sqlite3.Error as e:
+            print(f"History write failed: {e}")
+
+    def cluster_items(self, city_items):
+        """Give every item a story cluster id, across all cities at once.
+
+        Items keep the cluster their link had in the previous fetch; only
+        new headlines go through the MinHash index. Like
+        score_pending_items, each city's tuple in `city_items` is replaced
+        (or left as is). Returns how many new items joined a cluster that
+        already existed.
+        """
+        pending = []  # (city, position, headline)
+        assigned = {}  # city -> {position: cluster}
+        for city, news_items in city_items.items():
+            previous = {item.link: item.cluster for item in self.news_cache.get(city, ())
+                        if item.cluster is not None}
+            known = assigned[city] = {}
+            for position, item in enumerate(news_items):
+                if item.cluster is not None:
+                    continue
+                cluster = previous.get(item.link)
+                if cluster is not None:
+                    known[position] = cluster
+                else:
+                    pending.append((city, position, item.headline))
+        merged = 0
+        if pending:
+            merged_before = self.story_clusters.merged
+            with METRICS.span('story_clustering'):
+                clusters = self.story_clusters.assign([headline for _, _, headline in pending])
+            merged = self.story_clusters.merged - merged_before
+            for (city, position, _), cluster in zip(pending, clusters):
+                if cluster is not None:
+                    assigned[city][position] = cluster
+        for city, known in assigned.items():
+            if known:
+                city_items[city] = tuple(item.with_cluster(known[position])
+                                         if position in known else item
+                                         for position, item in enumerate(city_items[city]))
+        return merged
+
+    def record_trends(self, city_items):
+        """Feed newly scored headlines into each city's rolling series"""
+        # Samples are stamped with the scoring time: publish times arrive out
+        # of order, and the series is about sentiment as it was observed
+        now = time.time()
+        for city, news_items in city_items.items():
+            series = self.trends.get(city)
+            if series is None:
+                continue
+            known = self._trend_links.get(city, set())
+            scored = {}
+            for item in news_items:
+                if item.sentiment is not None:
+                    scored[item.link] = item.sentiment
+            for link, score in scored.items():
+                if link not in known:
+                    series.add(score, now)
+            # Unscored items stay out so they are counted once they get a score
+            self._trend_links[city] = set(scored)
+
+    def sentiment_trends(self, city, window, points=60):
+        """Rolling aggregates plus a downsampled series for one city"""
+        series = self.trends[city]
+        return {
+            'windows': series.stats(),
+            'series': series.series(window, points)
+        }
+
+    def collect_metrics(self):
+        """Metrics read from existing stats at scrape time, for METRICS.render()"""
+        caches = [(name, cache.stats()) for name, cache in
+                  (('sentiment', self.sentiment_cache), ('item_scores', self.item_scores))]
+        stream = self.broadcaster.stats()
+        llm = self.llm_governor.stats()
+        refresh = self.scheduler.stats()['cities'] if hasattr(self, 'scheduler') else {}
+        clusters = self.story_clusters.stats()
+        return [
+            ('cache_hits_total', 'counter', "Cache hits",
+             [({'cache': name}, stats['hits']) for name, stats in caches]),
+            ('cache_misses_total', 'counter', "Cache misses",
+             [({'cache': name}, stats['misses']) for name, stats in caches]),
+            ('cache_entries', 'gauge', "Entries held per cache",
+             [({'cache': name}, stats['entries']) for name, stats in caches]),
+            ('cached_items', 'gauge', "News items in the cache",
+             [({'city': city}, len(items)) for city, items in list(self.news_cache.items())]),
+            ('sse_clients', 'gauge', "Connected /news-stream clients",
+             [({}, stream['subscribers'])]),
+            ('sse_dropped_frames', 'gauge', "Frames dropped for slow SSE clients",
+             [({}, stream['dropped'])]),
+            ('snapshot_version', 'gauge', "Version of the published snapshot",
+             [({}, self.snapshot.version if self.snapshot else 0)]),
+            ('llm_events_total', 'counter', "LLM governor events",
+             [({'event': event}, llm[event]) for event in
+              ('calls', 'requests', 'coalesced', 'retries', 'throttled', 'failures',
+               'rejected', 'served_stale')]),
+            ('llm_circuit_open', 'gauge', "1 while the LLM circuit breaker is open",
+             [({}, 0 if llm['circuit'] == 'closed' else 1)]),
+            ('refresh_interval_seconds', 'gauge', "Current refresh interval per city",
+             [({'city': city}, state['interval']) for city, state in refresh.items()]),
+            ('story_clusters', 'gauge', "Story clusters in the dedup index",
+             [({}, clusters['clusters'])]),
+            ('story_cluster_items_total', 'counter', "Headlines clustered, by result",
+             [({'result': 'new'}, clusters['assigned'] - clusters['merged']),
+              ({'result': 'merged'}, clusters['merged'])]),
+        ]
+
+    def render_metrics(self):
+        """Prometheus text for /metrics"""
+        return METRICS.render(self.collect_metrics())
+
+    def status(self):
+        """Readiness and component stats for /status"""
+        return {
+            'scraper_ready': self.ready.is_set(),
+            'chrome_initialized': self.driver is not None,
+            'sentiment_cache': self.sentiment_cache.stats(),
+            'snapshot_version': self.snapshot.version if self.snapshot else 0,
+            'stream': self.broadcaster.stats(),
+            'refresh': self.scheduler.stats() if hasattr(self, 'scheduler') else {},
+            'llm': self.llm_governor.stats()
+        }
+
+    def shared_state(self, points=TREND_POINTS):
+        """Collector state that read-only web workers serve (see collector.py)"""
+        return {
+            'pid': os.getpid(),
+            'time': time.time(),
+            'cities': list(self.news_urls),
+            'history_db': os.path.abspath(self.history.path) if self.history else None,
+            'status': self.status(),
+            'metrics': {'registry': METRICS.render(), 'collected': self.collect_metrics()},
+            'trends': {city: {
+                'windows': series.stats(),
+                'series': {str(seconds): series.series(seconds, points)
+                           for seconds in self.trend_windows.values()}
+            } for city, series in self.trends.items()}
+        }
+
+    def sentiment_history(self, city, hours=24, bucket_minutes=60):
+        """Stored sentiment per time bucket for a city over the last `hours`"""
+        if self.history is None:
+            return []
+        since = time.time() - hours * 60 * 60
+        return [{'time': bucket, 'score': round(score, 3), 'count': count}
+                for bucket, score, count in
+                self.history.sentiment_trend(city, since, bucket_minutes * 60)]
+
+    def get_driver(self):
+        """Start Chrome on first call; returns None if it is unavailable"""
+        with self._driver_lock:
+            if not self._driver_attempted:
+                self._driver_attempted = True
+                self.initialize_chrome()
+            return self.driver
+
     def initialize_chrome(self):
-        """Initialize Chrome in a separate thread"""
+        """Initialize headless Chrome (called lazily by the browser backend)"""
         try:
+            from selenium import webdriver
+            from selenium.webdriver.chrome.options import Options
+            from selenium.webdriver.chrome.service import Service
+            import chromedriver_autoinstaller
+
             print("Starting Chrome initialization...")
             options = Options()
             options.add_argument('--headless=new')
@@ -71,7 +932,8 @@ class NewsScraperApp:
             options.add_argument('--remote-debugging-port=0')  # Use random port instead of 9222
             
             # Clear any existing ChromeDriver processes
-            os.system('taskkill /im chromedriver.exe /f')
+            if os.name == 'nt':
+                os.system('taskkill /im chromedriver.exe /f')
             
             # Explicit path handling with version check
             chromedriver_path = chromedriver_autoinstaller.install()
@@ -87,9 +949,7 @@ class NewsScraperApp:
             for attempt in range(max_retries):
                 try:
                     self.driver = webdriver.Chrome(service=service, options=options)
-                    self.driver.get('https://google.com')
-                    print("Chrome test navigation successful")
-                    self.ready.set()
+                    print("Chrome initialization successful")
                     break
                 except Exception as e:
                     if attempt < max_retries - 1:
@@ -100,16 +960,21 @@ class NewsScraperApp:
                         
         except Exception as e:
             print(f"Chrome initialization FAILED: {str(e)}")
-            self.ready.clear()
             if hasattr(self, 'driver') and self.driver:
                 self.driver.quit()
             # Fallback to direct requests if Chrome fails
             print("Falling back to pure requests-based scraping")
             self.driver = None
-            self.ready.set()
         
     def create_ui(self):
         """Create the user interface"""
+        import tkinter as tk
+        from tkinter import ttk, scrolledtext
+        from tk_updates import NewsPane, TkUpdateQueue
+
+        # Worker threads never touch widgets; they post to this queue
+        self.ui_updates = TkUpdateQueue(self.root)
+
         # Main container
         self.main_frame = ttk.Frame(self.root, padding="20")
         self.main_frame.pack(fill=tk.BOTH, expand=True)
@@ -124,10 +989,11 @@ class NewsScraperApp:
         
         # Create news and analysis sections
         self.news_areas = {}
+        self.news_panes = {}
         self.analysis_areas = {}
         self.status_labels = {}
         
-        for i, city in enumerate(['Bangalore', 'Mumbai', 'Delhi']):
+        for i, city in enumerate(self.news_urls.keys()):
             # Main city container
             city_frame = ttk.Frame(self.main_frame)
             city_frame.grid(row=0, column=i, padx=10, sticky="nsew")
@@ -154,6 +1020,7 @@ class NewsScraperApp:
             )
             news_area.pack(fill=tk.BOTH, expand=True)
             self.news_areas[city] = news_area
+            self.news_panes[city] = NewsPane(news_area)
             
             # Status label
             status_label = ttk.Label(city_frame, text="Ready")
@@ -186,302 +1053,482 @@ class NewsScraperApp:
             text="🔄 Refresh All",
             command=self.fetch_all_cities
         )
-        self.refresh_btn.grid(row=1, column=0, columnspan=3, pady=10)
+        self.refresh_btn.grid(row=1, column=0, columnspan=len(self.news_urls), pady=10)
         
     def fetch_news_for_city(self, city):
+        """Fetch, score and publish a single city"""
+        download = self.download_city_news(city)
+        if download is not None:
+            news_items, self.feed_state[city] = download
+            city_items = {city: news_items}
+            self.cluster_items(city_items)
+            news_items = self.score_news_items(city, city_items[city])
+            self.publish_city_news(city, news_items)
+            self.record_trends({city: news_items})
+            self.record_history({city: news_items})
+        self.publish_snapshot()
+
+    def download_city_news(self, city):
+        """Download and parse a city's feed.
+
+        Returns (parsed items, new feed state), or None when the feed is
+        unchanged or failed. The caller stores the feed state once it has
+        used the items, so a fetch whose result is dropped (it outlived
+        CYCLE_TIMEOUT) is processed again by the next one.
+        """
         # If a GUI exists, update its UI elements.
+        # (The panes are only cleared once there is new content to show.)
         if self.root is not None:
-            self.news_areas[city].delete(1.0, tk.END)
-            self.analysis_areas[city].delete(1.0, tk.END)
-            self.status_labels[city].config(text="Fetching news...")
+            self.show_status(city, "Fetching news...")
         else:
             print(f"Fetching news for {city} in headless mode...")
 
         try:
             print(f"\nFetching news for {city}...")
-            headers = {'User-Agent': 'Mozilla/5.0'}  # Add a User-Agent header
             url = requote_uri(self.news_urls[city])
             print(f"Using URL for {city}: {url}")
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            root_element = ET.fromstring(response.content)
+            state = self.feed_state.get(city, {})
+            headers = {}
+            if state.get('etag'):
+                headers['If-None-Match'] = state['etag']
+            if state.get('last_modified'):
+                headers['If-Modified-Since'] = state['last_modified']
+            # Default backend shares a keep-alive session between cycles
+            feed = self.city_feeds[city]
+            backend = self.fetch_backends.get(feed['backend'], self.fetch_backends['requests'])
+            with METRICS.span('http_fetch', city=city):
+                response = backend.fetch(url, headers, feed['timeout'])
+            if response.status_code == 304:
+                print(f"{city} feed not modified, keeping cached items")
+                self._mark_feed_unchanged(city)
+                return None
 
-            items = root_element.findall('.//item')
-            print(f"Found {len(items)} news items for {city}")
+            # Byte-identical body: skip parsing, cache replacement and analysis
+            body_hash = hashlib.sha1(response.content).hexdigest()
+            if body_hash == state.get('body_hash'):
+                print(f"{city} feed content unchanged, keeping cached items")
+                self._mark_feed_unchanged(city)
+                return None
+            new_state = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'body_hash': body_hash
+            }
 
             news_items = []
-            for item in items:
-                try:
-                    title = item.find('title').text
-                    link = item.find('link').text
-                    pubDate = item.find('pubDate').text
-                    source = item.find('source').text if item.find('source') is not None else "Unknown Source"
-
-                    try:
-                        pub_datetime = datetime.strptime(pubDate, '%a, %d %b %Y %H:%M:%S %Z')
-                    except ValueError:
-                        pub_datetime = datetime.now()
-
-                    pub_datetime = pub_datetime.replace(tzinfo=pytz.UTC).astimezone(pytz.timezone('Asia/Kolkata'))
-                    timestamp = pub_datetime.strftime('%I:%M %p')
-
-                    news_items.append({
-                        'headline': title.strip(),
-                        'source': source.strip(),
-                        'subheading': f"Published at {timestamp}",
-                        'timestamp': timestamp,
-                        'link': link.strip()
-                    })
-                    print(f"Processed: {title[:50]}...")
-                except Exception as e:
-                    print(f"Error processing item: {e}")
-                    continue
+            with METRICS.span('xml_parse', city=city):
+                for item in iter_rss_items(response.content):
+                    news_items.append(item)
+                    log_item('item_processed', f"Processed: {item.headline[:50]}...",
+                             city=city, headline=item.headline, source=item.source)
+            ITEMS_PROCESSED.inc(len(news_items), city=city)
 
-            # UI update:
-            if self.root is not None:
-                if news_items and self.root.winfo_exists():
-                    self.update_city_news(city, news_items)
-                else:
-                    self.status_labels[city].config(text="No recent news found")
-            else:
-                print(f"{city} News fetched: {len(news_items)} items")
+            print(f"Fetched {len(news_items)} items for {city}")
+            self.feed_status[city] = 'changed'
+            return tuple(news_items), new_state
 
+        except Exception as e:
+            print(f"SCRAPER ERROR ({city}): {e}")
+            FETCH_ERRORS.inc(city=city)
+            self.feed_status[city] = 'failed'
+            # Keep serving the last good items (possibly from history) until
+            # the feed answers; that answer is then processed in full
+            self.feed_state.pop(city, None)
+            return None
+
+    def publish_city_news(self, city, news_items):
+        """Show freshly scored items and make them visible to readers"""
+        # UI update:
+        if self.root is not None:
             if news_items:
-                self.send_to_analysis_api(city, news_items)
+                self.update_city_news(city, news_items)
             else:
-                print(f"No news items processed for {city}, skipping API analysis.")
+                self.show_status(city, "No recent news found")
+        else:
+            print(f"{city} News fetched: {len(news_items)} items")
 
-            print(f"Fetched {len(news_items)} items for {city}")
-            self.news_cache[city] = news_items
+        if news_items:
+            news_items = self.send_to_analysis_api(city, news_items)
+        else:
+            print(f"No news items processed for {city}, skipping API analysis.")
 
-        except Exception as e:
-            print(f"SCRAPER ERROR ({city}): {e}")
-            self.news_cache[city] = []
-        
-    def update_city_news(self, city, news_items):
-        """Update the news display for a city"""
         with self.cache_lock:
-            self.news_cache[city] = news_items
-        
-        try:
-            news_area = self.news_areas[city]
-            news_area.delete(1.0, tk.END)
-            
-            print(f"Updating display for {city} with {len(news_items)} items")
-            
-            for i, news in enumerate(news_items, 1):
-                # Add headline
-                news_area.insert(tk.END, f"{i}. ", "number")
-                news_area.insert(tk.END, f"{news['headline']}\n", "headline")
-                
-                # Add source
-                news_area.insert(tk.END, f"Source: {news['source']}\n", "source")
-                
-                # Add description
-                news_area.insert(tk.END, f"{news['subheading']}\n", "subheading")
-                
-                # Add timestamp
-                news_area.insert(tk.END, f"Posted: {news['timestamp']}\n", "timestamp")
-                
-                news_area.insert(tk.END, "─" * 50 + "\n\n", "separator")
-            
-            # Configure tags
-            news_area.tag_configure("number", font=("Arial", 10, "bold"), foreground="#666666")
-            news_area.tag_configure("headline", font=("Arial", 11, "bold"))
-            news_area.tag_configure("source", font=("Arial", 9), foreground="#666666")
-            news_area.tag_configure("subheading", font=("Arial", 10))
-            news_area.tag_configure("timestamp", font=("Arial", 9, "italic"), foreground="#0066cc")
-            news_area.tag_configure("separator", foreground="#cccccc")
+            self.news_cache[city] = tuple(news_items)
             
+    def _mark_feed_unchanged(self, city):
+        """Report a skipped (unchanged) feed to the GUI"""
+        self.feed_status[city] = 'unchanged'
+        if self.root is not None:
+            self.show_status(city, f"No changes ({len(self.news_cache.get(city, []))} news items)")
+        
+    def update_city_news(self, city, news_items):
+        """Queue a city's items for display (any thread).
+
+        The Tk loop renders them a few at a time, inserting only the
+        headlines that are not on screen yet (see tk_updates.NewsPane).
+        """
+        def render():
+            yield from self.news_panes[city].render(news_items)
             self.status_labels[city].config(text=f"Found {len(news_items)} news items")
             print(f"Display updated for {city}")
-            
-        except Exception as e:
-            print(f"Error updating display: {str(e)}")
+
+        print(f"Updating display for {city} with {len(news_items)} items")
+        self.ui_updates.post(('news', city), render)
+
+    def show_status(self, city, text):
+        """Set a city's status label from any thread"""
+        label = self.status_labels[city]
+        self.ui_updates.post(('status', city), lambda: label.config(text=text))
+
+    def show_analysis(self, city, text):
+        """Replace a city's analysis text from any thread"""
+        import tkinter as tk
+
+        def update_display():
+            area = self.analysis_areas[city]
+            area.config(state=tk.NORMAL)
+            area.delete(1.0, tk.END)
+            area.insert(tk.END, text)
+            area.config(state=tk.DISABLED)
+
+        self.ui_updates.post(('analysis', city), update_display)
         
     def fetch_all_cities(self):
-        """Fetch news for all cities"""
-        # Disable the refresh button if running in GUI mode.
-        if self.root:
-            self.refresh_btn.config(state='disabled')
-        
-        def fetch_task():
-            # Fetch news for each city sequentially.
-            for city in self.news_urls.keys():
-                # (Optional) Check if the window is still alive.
-                if self.root and not self.root.winfo_exists():
-                    break
-                self.fetch_news_for_city(city)
-            
-            # Re-enable the refresh button on the main thread.
-            if self.root and self.root.winfo_exists():
-                self.root.after(0, lambda: self.refresh_btn.config(state='normal'))
-        
-        # Run the fetching task in a separate thread.
-        t = threading.Thread(target=fetch_task, daemon=True)
-        t.start()
+        """Refresh all cities as soon as the scheduler is free"""
+        self.scheduler.request_refresh()
         
-    def auto_refresh(self):
-        """Auto refresh news every 20 seconds"""
-        self.fetch_all_cities()
-        self.root.after(20000, self.auto_refresh)
+    def fetch_cities_concurrently(self, cities=None):
+        """Fetch the given cities (default: all) on the worker pool and wait.
+
+        Returns {city: outcome}: 'changed', 'unchanged', 'failed', or 'busy'
+        when the city's previous fetch has not finished yet.
+        """
+        cities = list(cities or self.news_urls.keys())
+        started = time.monotonic()
+        outcomes = {}
+        futures = {}
+        for city in cities:
+            # Never start a second fetch for a city that timed out last cycle
+            running = self._inflight.get(city)
+            if running is not None and not running.done():
+                outcomes[city] = 'busy'
+                continue
+            future = self.fetch_pool.submit(self.download_city_news, city)
+            futures[future] = city
+            self._inflight[city] = future
+        done, pending = wait(futures, timeout=CYCLE_TIMEOUT)
+        for future in pending:
+            print(f"Fetch for {futures[future]} still running after {CYCLE_TIMEOUT}s")
+            outcomes[futures[future]] = 'busy'
+
+        # Cluster and score every changed city in one batched pass, then publish
+        changed = {}
+        for future in done:
+            city = futures[future]
+            outcomes[city] = self.feed_status.get(city, 'failed')
+            if future.result() is not None:
+                changed[city], self.feed_state[city] = future.result()
+        for city, outcome in outcomes.items():
+            FEED_FETCHES.inc(city=city, outcome=outcome)
+        if changed and self.snapshot is None:
+            # Cold start: show the headlines now, clusters and sentiment follow
+            with self.cache_lock:
+                self.news_cache.update(changed)
+            self.publish_snapshot(score_missing=False)
+        if changed:
+            duplicates = self.cluster_items(changed)
+            if duplicates:
+                print(f"{duplicates} new headlines repeat a story already seen")
+        if changed:
+            self.score_pending_items(changed)
+        for city, news_items in changed.items():
+            self.publish_city_news(city, news_items)
+        self.publish_snapshot()
+        self.record_trends(changed)
+        self.record_history(changed)
+        elapsed = time.monotonic() - started
+        print(f"Refresh cycle for {len(cities)} cities took {elapsed:.2f}s")
+        return outcomes
         
     def send_to_analysis_api(self, city, news_items):
-        """Send complete news data to analysis API with custom instructions"""
+        """Score any new headlines and show the aggregated city sentiment.
+
+        Returns the (scored) items.
+        """
         try:
-            headlines = "\n".join([item['headline'] for item in news_items])
-            
-            # Custom API instructions
-            analysis_prompt = f"""Analyze sentiment and key themes of these {city} news headlines. Follow these rules:
-1. Start with overall sentiment (Very Negative/Negative/Neutral/Positive/Very Positive)
-2. Read and analyse the headlines and get a detailed analysis of the news.
-3. Highlight any urgent or developing situations
-4. Use bullet points for clarity
-5. Just give the analysis in the response, of numbers(Very Negative/Negative/Neutral/Positive/Very Positive)
-
-Example response 1:
-Sentiment: Positive
-Your Output: 4
-
-Example response 2:
-Sentiment: Negative
-Your Output: 2
-
-Example response 3:
-Sentiment: Neutral
-Your Output: 3
-
-Example response 4:
-Sentiment: Very Negative
-Your Output: 1
-
-Example response 5:
-Sentiment: VeryPositive
-Your Output: 5
-
-You are not suppose to give any other text in the response, just the numbers.
-Headlines to analyze: {headlines}"""
+            news_items = self.score_news_items(city, news_items)
+            score = self.aggregate_sentiment(news_items)
+            if score is None:
+                raise RuntimeError("no headlines could be scored")
+            scored = sum(1 for item in news_items if item.sentiment is not None)
+            analysis = (f"Sentiment: {self._sentiment_label(score)} ({score:.2f}/5)\n"
+                        f"Scored {scored} of {len(news_items)} headlines")
             
-            response = self.client.chat.completions.create(
-                model="nvidia/llama-3.1-nemotron-70b-instruct:free",
-                messages=[{
-                    "role": "user",
-                    "content": analysis_prompt
-                }]
-            )
-            analysis = response.choices[0].message.content
-            
-            if self.root and self.root.winfo_exists():
-                self.analysis_areas[city].delete(1.0, tk.END)
-                self.analysis_areas[city].insert(tk.END, analysis)
+            if self.root is not None:
+                self.show_analysis(city, analysis)
             
         except Exception as e:
             print(f"API Error for {city}: {str(e)}")
-            if self.root and self.root.winfo_exists():
-                self.analysis_areas[city].insert(tk.END, f"Analysis error: {str(e)}")
+            if self.root is not None:
+                self.show_analysis(city, f"Analysis error: {str(e)}")
+        return news_items
+
+    def _item_key(self, item):
+        """Identity of a headline for score deduplication: its story cluster if known"""
+        if item.cluster is not None:
+            return ('cluster', item.cluster)
+        return item.link or item.headline
+
+    def score_news_items(self, city, news_items):
+        """One city's items with a 1-5 sentiment on each (see score_pending_items)"""
+        city_items = {city: news_items}
+        self.score_pending_items(city_items)
+        return city_items[city]
+
+    def score_pending_items(self, city_items):
+        """Score the items of several cities at once.
+
+        Known headlines get their remembered score; the rest go through the
+        configured sentiment backends in one batched pass. Items are
+        immutable, so each city's tuple in `city_items` is replaced by a
+        scored copy (or left as is when nothing changed). Returns the
+        number of headlines that were newly scored.
+        """
+        known = {}  # item key -> score
+        pending = OrderedDict()  # item key -> (city, headline)
+        with METRICS.span('cache_lookup', cache='item_scores'):
+            for city, news_items in city_items.items():
+                for item in news_items:
+                    if item.sentiment is not None:
+                        continue
+                    key = self._item_key(item)
+                    if key in known or key in pending:
+                        continue  # Same story in another feed
+                    score = self.item_scores.get(key)
+                    if score is not None:
+                        known[key] = score
+                    else:
+                        pending[key] = (city, item.headline)
+
+        scores = {}
+        if pending:
+            keys = list(pending)
+            scores, fallback = self.score_entries(list(pending.values()))
+            for index, score in scores.items():
+                known[keys[index]] = score
+                # Fallback scores are not remembered, so the LLM gets another go
+                if index not in fallback:
+                    self.item_scores.put(keys[index], score)
+            by_fallback = len(fallback.intersection(scores))
+            HEADLINES_SCORED.inc(len(scores) - by_fallback, method='backend')
+            HEADLINES_SCORED.inc(by_fallback, method='fallback')
+            print(f"Scored {len(scores)}/{len(pending)} new headlines across "
+                  f"{len(city_items)} cities ({len(fallback)} by fallback)")
+        if known:
+            for city, news_items in city_items.items():
+                city_items[city] = self._apply_scores(news_items, known)
+        return len(scores)
+
+    def _apply_scores(self, news_items, known):
+        """Copy of news_items with scores from `known`, or news_items if none apply"""
+        changed = False
+        scored = []
+        for item in news_items:
+            if item.sentiment is None:
+                score = known.get(self._item_key(item))
+                if score is not None:
+                    item = item.with_sentiment(score)
+                    changed = True
+            scored.append(item)
+        return tuple(scored) if changed else news_items
+
+    def score_entries(self, entries):
+        """Score (city, headline) pairs with the configured backends.
+
+        Returns ({index: score}, indices scored by the lexicon fallback).
+        """
+        if self.sentiment_mode == 'lexicon':
+            return self.lexicon_backend.score(entries), set()
+
+        scores = {}
+        if self.sentiment_mode == 'hybrid':
+            # Clear-cut headlines never reach the LLM
+            scores.update(self.lexicon_backend.score(entries, LEXICON_CONFIDENCE))
+        remaining = [index for index in range(len(entries)) if index not in scores]
+        if remaining:
+            llm_scores = self.llm_backend.score([entries[index] for index in remaining])
+            for position, score in llm_scores.items():
+                scores[remaining[position]] = score
+
+        # Whatever the LLM could not score (down, slow, malformed) falls back
+        fallback = [index for index in range(len(entries)) if index not in scores]
+        if fallback:
+            local = self.lexicon_backend.score([entries[index] for index in fallback])
+            for position, score in local.items():
+                scores[fallback[position]] = score
+        return scores, set(fallback)
+
+    def aggregate_sentiment(self, news_items):
+        """Recency-weighted mean of item scores (1-5), or None if nothing is scored"""
+        scored = [item for item in news_items if item.sentiment is not None]
+        if not scored:
+            return None
+        # Weights halve every SENTIMENT_HALF_LIFE before the newest headline,
+        # so the result depends only on the headline set itself
+        newest = max(item.published_at for item in scored)
+        total = weight_sum = 0.0
+        for item in scored:
+            age = newest - item.published_at
+            weight = 0.5 ** (age / SENTIMENT_HALF_LIFE)
+            total += weight * item.sentiment
+            weight_sum += weight
+        return total / weight_sum
+
+    def _sentiment_label(self, score):
+        """Map an aggregated 1-5 score to its text label"""
+        return SENTIMENT_LABELS[min(max(int(round(score)), 1), 5) - 1]
 
     def store_analysis(self, city, analysis):
         """Update the analysis display"""
-        def update_display():
-            self.analysis_areas[city].config(state=tk.NORMAL)
-            self.analysis_areas[city].delete(1.0, tk.END)
-            self.analysis_areas[city].insert(tk.END, analysis)
-            self.analysis_areas[city].config(state=tk.DISABLED)
-            
-        if self.root.winfo_exists():
-            self.root.after(0, update_display)
+        self.show_analysis(city, analysis)
         
         print(f"\nAnalysis for {city}:")
         print(analysis)
 
+    def publish_snapshot(self, score_missing=True):
+        """Encode all cities once and publish them as the next snapshot.
+
+        The version only moves when some city's content actually changed,
+        and it is unique across restarts.
+        With score_missing=False unscored cities are published as pending
+        instead of waiting for the LLM.
+        """
+        with self.snapshot_lock:
+            previous = self.snapshot
+            old_hashes = previous.city_hashes if previous else {}
+            now = time.time()
+            fragments, city_hashes, city_states = [], {}, {}
+            for city in self.news_urls.keys():
+                items = self.get_news_items(city)
+                if items:
+                    analysis = self.analyze_news_trends(city, score_missing)
+                    items = self.get_news_items(city)  # May have gained scores
+                else:
+                    analysis = "No news available"
+                ids = self.snapshot_deltas.item_ids(city, items)
+                content_hash, fragment, entry = self._encode_city(city, items, ids, analysis)
+                old = old_hashes.get(city)
+                updated = old[1] if old and old[0] == content_hash else now
+                city_hashes[city] = (content_hash, updated)
+                city_states[city] = (ids, dict(entry, updated=updated), items)
+                fragments.append(b'%s,"updated":%s}' % (fragment[:-1], json.dumps(updated).encode()))
+
+            if previous and city_hashes == old_hashes:
+                return previous
+
+            # The first version is the boot time in milliseconds, so versions
+            # never repeat across restarts and a client's old version can't
+            # match different content
+            version = previous.version + 1 if previous else int(now * 1000)
+            with METRICS.span('snapshot_serialization'):
+                body = b'{"version":%d,"updated":%s,"news":[%s]}' % (
+                    version, json.dumps(now).encode(), b','.join(fragments))
+                deltas = self.snapshot_deltas.encode(version, now, city_states)
+                self.snapshot = NewsSnapshot(version, now, body, city_hashes, deltas)
+            self.broadcaster.publish(self.snapshot)
+            print(f"Published news snapshot v{version} ({len(body)} bytes)")
+            return self.snapshot
+
+    def _encode_city(self, city, items, ids, analysis):
+        """(content hash, JSON bytes, entry without items) of a city, re-encoded only when it changed"""
+        memo = self._city_fragments.get(city)
+        if memo is not None and memo[0] is items and memo[1] == analysis and memo[2] == ids:
+            return memo[3:]
+        with METRICS.span('city_serialization'):
+            score = self.aggregate_sentiment(items)
+            entry = {'name': city.lower(), 'analysis': analysis,
+                     'score': round(score, 2) if score is not None else None}
+            # Display strings are formatted here, once per published item list
+            fragment = json.dumps(dict(entry, items=[dict(id=item_id, **item.to_json())
+                                                     for item_id, item in zip(ids, items)]),
+                                  separators=(',', ':')).encode('utf-8')
+        content_hash = hashlib.sha1(fragment).hexdigest()
+        self._city_fragments[city] = (items, analysis, ids, content_hash, fragment, entry)
+        return content_hash, fragment, entry
+
     def get_news_items(self, city):
-        """Thread-safe news cache access"""
-        with self.cache_lock:  # Add this lock initialization in __init__
-            return self.news_cache.get(city, []).copy()  # Return a copy
+        """A city's cached items; the tuple is immutable, so no copy or lock is needed"""
+        return self.news_cache.get(city, ())
         
     def __del__(self):
         """Cleanup"""
         if hasattr(self, 'driver') and self.driver:
             self.driver.quit()
+        if hasattr(self, 'scheduler'):
+            self.scheduler.stop()
+        if hasattr(self, 'fetch_pool'):
+            self.fetch_pool.shutdown(wait=False)
 
     def run_headless(self):
         """Headless mode operation"""
-        self.ready.wait()  # Wait for Chrome initialization
-
-        # Perform an immediate synchronous fetch for all cities before entering the refresh loop.
-        for city in self.news_urls.keys():
-            self.fetch_news_for_city(city)
+        self.ready.wait()  # Wait for initialization
+        # The scheduler started in __init__ does the fetching; just keep it alive
+        self.scheduler.start().join()
 
-        while True:
-            self.fetch_all_cities()
-            time.sleep(20)
+    def _headline_key(self, city, items):
+        """Sentiment cache key for a city's items, memoized per items list"""
+        memo = self._headline_keys.get(city)
+        if memo is not None and memo[0] is items:
+            return memo[1]
+        key = SentimentCache.make_key(city, [item.headline for item in items])
+        self._headline_keys[city] = (items, key)
+        return key
 
-    def analyze_news_trends(self, city):
-        """Identify long-term trends with custom instructions"""
+    def analyze_news_trends(self, city, score_missing=True):
+        """Aggregate per-headline scores into the city's sentiment label"""
         try:
-            news_text = "\n".join([item['headline'] for item in self.news_cache.get(city, [])])
-            if not news_text:
+            items = self.get_news_items(city)
+            if not items:
                 return "No news available for trend analysis"
-            
-            # Trend analysis specific instructions
-            trend_prompt = f"""Analyze sentiment of these {city} news headlines. Rules:
-1. Return ONLY one of these numbers based on overall sentiment:
-   - 1: Very Negative
-   - 2: Negative 
-   - 3: Neutral
-   - 4: Positive
-   - 5: Very Positive
-2. Base your analysis strictly on the headlines below
-3. No additional text or formatting only numbers
 
-Headlines:
-{news_text}"""
-            
-            response = self.client.chat.completions.create(
-                model="nvidia/llama-3.1-nemotron-70b-instruct:free",
-                messages=[{
-                    "role": "user",
-                    "content": trend_prompt
-                }]
-            )
-            return self._convert_sentiment_number(response.choices[0].message.content)
+            cache_key = self._headline_key(city, items)
+            with METRICS.span('cache_lookup', cache='sentiment'):
+                cached = self.sentiment_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            # Normally everything was scored during the fetch; this only
+            # picks up headlines whose scoring failed last time
+            if score_missing:
+                scored = self.score_news_items(city, items)
+                if scored is not items:
+                    with self.cache_lock:
+                        # Unless a newer fetch replaced them meanwhile
+                        if self.news_cache.get(city) is items:
+                            self.news_cache[city] = scored
+                    items = scored
+            score = self.aggregate_sentiment(items)
+            if score is None:
+                return "Neutral" if score_missing else "Analysis pending..."
+            analysis = self._sentiment_label(score)
+            if all(item.sentiment is not None for item in items):
+                self.sentiment_cache.put(cache_key, analysis)
+            return analysis
             
         except Exception as e:
             print(f"Trend analysis failed for {city}: {str(e)}")
-            return "3"  # Fallback to neutral
-
-    def _convert_sentiment_number(self, response):
-        """Convert numeric response to text label"""
-        try:
-            num = int(response.strip())
-            if 1 <= num <= 5:
-                return ["Very Negative", "Negative", "Neutral", "Positive", "Very Positive"][num-1]
-            return "Neutral"
-        except:
-            return "Neutral"
+            return "Neutral"  # Fallback to neutral
 
     def parse_rss_feed(self, rss_content):
         """Parse RSS XML content"""
         try:
-            root = ET.fromstring(rss_content)
-            items = []
-            for item in root.findall('.//item'):
-                try:
-                    items.append({
-                        'headline': item.find('title').text.strip(),
-                        'link': item.find('link').text.strip(),
-                        'source': item.find('source').text.strip() if item.find('source') is not None else 'Unknown',
-                        'timestamp': datetime.now(pytz.utc).strftime('%Y-%m-%d %H:%M:%S %Z')
-                    })
-                except AttributeError as e:
-                    print(f"RSS item parse error: {str(e)}")
-                    continue
-            return items
+            return list(iter_rss_items(rss_content))
         except ET.ParseError as e:
             print(f"Invalid RSS XML: {str(e)}")
             return []
 
 if __name__ == "__main__":
+    import tkinter as tk
     root = tk.Tk()
     app = NewsScraperApp(root)
     root.mainloop()
@@ -0,0 +1,131 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+
+# Per-city polling interval: starts at the minimum, shrinks while a feed keeps
+# changing and grows while it stays the same (seconds)
+REFRESH_MIN_INTERVAL = float(os.environ.get('NEWS_REFRESH_MIN', '20'))
+REFRESH_MAX_INTERVAL = float(os.environ.get('NEWS_REFRESH_MAX', '300'))
+CHANGED_FACTOR = 0.5  # interval multiplier after new content
+UNCHANGED_FACTOR = 1.5  # interval multiplier after a 304/identical body
+BACKOFF_MAX = 10 * 60  # cap of the exponential delay after failures
+REFRESH_JITTER = 0.1  # +/- fraction, so cities drift apart instead of syncing
+COALESCE_WINDOW = 2.0  # cities due this soon join the current cycle
+
+
+class RefreshScheduler:
+    """Runs refresh cycles for the cities that are due, one cycle at a time.
+
+    `run_cycle(cities)` fetches, scores and publishes the given cities and
+    returns {city: outcome} with outcome 'changed', 'unchanged', 'failed'
+    or 'busy' (a previous fetch is still running). Cycles never overlap, so
+    each city has at most one fetch in flight and a slow feed or LLM only
+    delays the next cycle instead of stacking up threads.
+    """
+    def __init__(self, run_cycle, cities, min_interval=REFRESH_MIN_INTERVAL,
+                 max_interval=REFRESH_MAX_INTERVAL):
+        self.run_cycle = run_cycle
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        now = time.monotonic()
+        self._state = {city: {'interval': min_interval, 'due': now, 'failures': 0,
+                              'outcome': None, 'requested': False} for city in cities}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self.cycles = 0
+        self.cycle_times = deque(maxlen=100)  # seconds of the most recent cycles
+
+    def start(self):
+        """Start the scheduler thread (idempotent)"""
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, daemon=True,
+                                                name='news-scheduler')
+                self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def request_refresh(self, cities=None):
+        """Make cities (default: all) due now, e.g. for the refresh button"""
+        now = time.monotonic()
+        with self._cond:
+            for city in cities or self._state:
+                if city in self._state:
+                    self._state[city]['due'] = now
+                    self._state[city]['requested'] = True
+            self._cond.notify_all()
+
+    def _next_due(self):
+        """Wait until at least one city is due; returns the due cities"""
+        with self._cond:
+            while not self._stopped:
+                now = time.monotonic()
+                earliest = min((state['due'] for state in self._state.values()), default=None)
+                if earliest is not None and earliest <= now:
+                    due = [city for city, state in self._state.items()
+                           if state['due'] <= now + COALESCE_WINDOW]
+                    for city in due:
+                        self._state[city]['requested'] = False
+                    return due
+                self._cond.wait(None if earliest is None else earliest - now)
+            return []
+
+    def _loop(self):
+        while True:
+            cities = self._next_due()
+            if not cities:
+                return
+            started = time.monotonic()
+            try:
+                outcomes = self.run_cycle(cities)
+            except Exception as e:
+                print(f"Refresh cycle failed: {e}")
+                outcomes = {city: 'failed' for city in cities}
+            self.cycles += 1
+            self.cycle_times.append(time.monotonic() - started)
+            for city in cities:
+                self.record(city, outcomes.get(city, 'failed'))
+
+    def record(self, city, outcome, now=None):
+        """Adapt a city's interval to its last outcome and schedule it again"""
+        now = now or time.monotonic()
+        with self._cond:
+            state = self._state[city]
+            state['outcome'] = outcome
+            if outcome in ('failed', 'busy'):
+                state['failures'] += 1
+                delay = min(self.min_interval * 2 ** state['failures'], BACKOFF_MAX)
+            else:
+                state['failures'] = 0
+                factor = CHANGED_FACTOR if outcome == 'changed' else UNCHANGED_FACTOR
+                state['interval'] = min(max(state['interval'] * factor, self.min_interval),
+                                        self.max_interval)
+                delay = state['interval']
+            delay *= random.uniform(1 - REFRESH_JITTER, 1 + REFRESH_JITTER)
+            # A manual refresh requested while the cycle ran wins over the new delay
+            state['due'] = now if state['requested'] else now + delay
+
+    def stats(self):
+        now = time.monotonic()
+        with self._cond:
+            return {
+                'cycles': self.cycles,
+                'recent_cycle_seconds': [round(seconds, 3) for seconds in self.cycle_times],
+                'cities': {city: {
+                    'interval': round(state['interval'], 1),
+                    'next_in': round(max(state['due'] - now, 0), 1),
+                    'failures': state['failures'],
+                    'last_outcome': state['outcome']
+                } for city, state in self._state.items()}
+            }
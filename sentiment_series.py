@@ -0,0 +1,167 @@
+import math
+import os
+import threading
+import time
+
+# Rolling sentiment windows per city, e.g. NEWS_TREND_WINDOWS="15m,1h,24h"
+TREND_WINDOWS = os.environ.get('NEWS_TREND_WINDOWS', '15m,1h,24h')
+TREND_CAPACITY = 8192  # samples kept per city (fixed memory: ~12 bytes each)
+
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_window(text):
+    """'15m' -> 900 seconds"""
+    text = text.strip().lower()
+    if text[-1:] in _UNITS:
+        return float(text[:-1]) * _UNITS[text[-1]]
+    return float(text)
+
+
+def parse_windows(spec=TREND_WINDOWS):
+    """Ordered {label: seconds} from a comma-separated window list"""
+    return {label.strip(): parse_window(label) for label in spec.split(',') if label.strip()}
+
+
+class _WindowStats:
+    """Running aggregates for one window over the ring buffer"""
+    __slots__ = ('seconds', 'tail', 'count', 'total', 'squares', 'ewma', 'ewma_time',
+                 'ewma_base', 'ewma_alpha', 'batch_count', 'batch_total')
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.tail = 0  # Sequence number of the oldest sample inside the window
+        self.count = 0
+        self.total = 0.0
+        self.squares = 0.0
+        self.ewma = None
+        self.ewma_time = None
+        # Samples sharing ewma_time form one batch, applied as their mean
+        # to the EWMA as it was before that time (ewma_base)
+        self.ewma_base = None
+        self.ewma_alpha = 1.0
+        self.batch_count = 0
+        self.batch_total = 0.0
+
+
+class SentimentSeries:
+    """Fixed-size ring buffer of (timestamp, score) with O(1) rolling aggregates.
+
+    Every window keeps a running count, sum and sum of squares plus a tail
+    pointer into the buffer. A new sample is added to each window and the
+    tails advance past samples that fell out of their window or were
+    overwritten, so each sample is added and removed once (amortized O(1)).
+    The buffer (and numpy) is only allocated with the first sample.
+    EWMA uses a time-based decay with the window length as time constant;
+    samples with the same timestamp (one scoring cycle) count as one
+    update with their mean.
+    """
+    def __init__(self, windows=None, capacity=TREND_CAPACITY):
+        self.capacity = capacity
+        self.times = self.scores = None  # numpy arrays, allocated by the first add
+        self.head = 0  # Sequence number of the next sample
+        self.windows = {label: _WindowStats(seconds)
+                        for label, seconds in (windows or parse_windows()).items()}
+        self._lock = threading.Lock()
+
+    def add(self, score, timestamp=None):
+        with self._lock:
+            timestamp = timestamp or time.time()
+            if self.times is None:
+                import numpy as np
+                self.times = np.zeros(self.capacity, dtype=np.float64)
+                self.scores = np.zeros(self.capacity, dtype=np.float32)
+            if self.head:
+                # Keep the buffer ordered even if the clock steps back
+                timestamp = max(timestamp, float(self.times[(self.head - 1) % self.capacity]))
+            overwritten = self.head - self.capacity  # Sequence number being replaced
+            for window in self.windows.values():
+                while window.tail <= overwritten and window.tail < self.head:
+                    self._evict(window)
+
+            slot = self.head % self.capacity
+            self.times[slot] = timestamp
+            self.scores[slot] = score
+            self.head += 1
+
+            for window in self.windows.values():
+                window.count += 1
+                window.total += score
+                window.squares += score * score
+                if timestamp != window.ewma_time:
+                    window.ewma_base = window.ewma
+                    window.ewma_alpha = 1.0 if window.ewma is None else (
+                        1.0 - math.exp(-(timestamp - window.ewma_time) / window.seconds))
+                    window.batch_count = 0
+                    window.batch_total = 0.0
+                    window.ewma_time = timestamp
+                window.batch_count += 1
+                window.batch_total += score
+                batch_mean = window.batch_total / window.batch_count
+                if window.ewma_base is None:
+                    window.ewma = batch_mean
+                else:
+                    window.ewma = window.ewma_base + window.ewma_alpha * (batch_mean - window.ewma_base)
+                self._expire(window, timestamp)
+
+    def _evict(self, window):
+        score = float(self.scores[window.tail % self.capacity])
+        window.count -= 1
+        window.total -= score
+        window.squares -= score * score
+        window.tail += 1
+        if window.count == 0:
+            window.total = window.squares = 0.0  # Drop accumulated rounding error
+
+    def _expire(self, window, now):
+        cutoff = now - window.seconds
+        while window.tail < self.head and self.times[window.tail % self.capacity] < cutoff:
+            self._evict(window)
+
+    def stats(self, now=None):
+        """{label: {mean, ewma, count, volatility}} for every window"""
+        with self._lock:
+            now = now or time.time()
+            result = {}
+            for label, window in self.windows.items():
+                self._expire(window, now)
+                if window.count:
+                    mean = window.total / window.count
+                    variance = max(window.squares / window.count - mean * mean, 0.0)
+                    result[label] = {
+                        'mean': round(mean, 3),
+                        'ewma': round(window.ewma, 3),
+                        'count': window.count,
+                        'volatility': round(math.sqrt(variance), 3)
+                    }
+                else:
+                    result[label] = {'mean': None, 'ewma': None, 'count': 0, 'volatility': None}
+            return result
+
+    def series(self, seconds, points=60, now=None):
+        """Samples of the last `seconds`, averaged into at most `points` buckets"""
+        if not self.head:
+            return []
+        import numpy as np
+
+        with self._lock:
+            now = now or time.time()
+            size = min(self.head, self.capacity)
+            start = self.head - size
+            order = (np.arange(start, self.head) % self.capacity) if size else np.arange(0)
+            times = self.times[order]
+            scores = self.scores[order]
+
+        begin = now - seconds
+        mask = times >= begin
+        times, scores = times[mask], scores[mask]
+        if not len(times):
+            return []
+        width = seconds / points
+        buckets = np.minimum(((times - begin) // width).astype(np.intp), points - 1)
+        counts = np.bincount(buckets, minlength=points)
+        sums = np.bincount(buckets, weights=scores, minlength=points)
+        filled = np.flatnonzero(counts)
+        return [{'time': round(float(begin + (index + 0.5) * width), 1),
+                 'score': round(float(sums[index] / counts[index]), 3),
+                 'count': int(counts[index])} for index in filled]
@@ -1,73 +1,127 @@
 import os
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'  # Suppress TensorFlow logging
 
-from flask import Flask, render_template, jsonify, Response
-from news_scraper import NewsScraperApp
+from flask import Flask, render_template, jsonify, Response, request, g
+from instrumentation import METRICS
+from sentiment_series import parse_window
+from snapshot_store import SNAPSHOT_FILE, news_data_response
 import threading
 import time
-import json
 
 app = Flask(__name__)
-scraper = NewsScraperApp()  # No UI (root is None)
+if SNAPSHOT_FILE:
+    # Read-only worker: `python collector.py` fetches and scores once for
+    # every worker and publishes snapshots through NEWS_SNAPSHOT_FILE
+    from snapshot_store import SnapshotConsumer
+    scraper = SnapshotConsumer(SNAPSHOT_FILE)
+else:
+    from news_scraper import NewsScraperApp
+    scraper = NewsScraperApp()  # No UI (root is None)
 
-# Start the headless news-fetching process in a separate thread
-threading.Thread(target=scraper.run_headless, daemon=True).start()
+    # Start the headless news-fetching process in a separate thread
+    threading.Thread(target=scraper.run_headless, daemon=True).start()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    # Streaming responses are timed until their headers are ready
+    started = getattr(g, 'request_started', None)
+    if started is not None:
+        METRICS.histogram('http_request_seconds', "Flask handler latency").observe(
+            time.perf_counter() - started, endpoint=request.endpoint or 'unknown',
+            status=response.status_code)
+    return response
 
 @app.route('/')
 def index():
-    return render_template('index.html', cities=['Bangalore', 'Mumbai', 'Delhi'])
+    scraper.ready.wait(timeout=10)  # A worker learns the cities from the first snapshot
+    return render_template('index.html', cities=list(scraper.news_urls.keys()))
 
 @app.route('/news-data')
 def news_data():
     try:
         if not scraper or not scraper.ready.wait(timeout=10):
             return jsonify({'error': 'Initializing...'}), 202
-            
-        response_data = []
-        for city in scraper.news_urls.keys():
-            items = scraper.get_news_items(city)
-            analysis = scraper.analyze_news_trends(city) if items else "No news available"
-            response_data.append({
-                'name': city.lower(),  # Match frontend ID format
-                'items': items,
-                'analysis': analysis,
-                'updated': time.time()
-            })
-            
-        return jsonify({'news': response_data})
+
+        # Pre-encoded by the background fetcher; serving is a pointer read
+        snapshot = scraper.snapshot
+        if snapshot is None:
+            return jsonify({'error': 'Initializing...'}), 202
+
+        # Same rules as the asyncio server: 304 while current, the delta
+        # since the client's version when kept, otherwise the full snapshot
+        status, body, headers = news_data_response(
+            snapshot, request.args.get('since'), request.args.get('version'),
+            request.headers.get('If-None-Match', ''), request.headers.get('Accept-Encoding', ''))
+        response = Response(body, status=status, headers=headers)
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/status')
 def status():
+    return jsonify(scraper.status())
+
+@app.route('/metrics')
+def metrics():
+    # Prometheus text exposition of spans, counters and scraper gauges
+    return Response(scraper.render_metrics(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/history')
+def history():
+    # Stored sentiment over days of history, straight from the SQLite indexes
+    city = request.args.get('city', '')
+    cities = {name.lower(): name for name in scraper.news_urls.keys()}
+    if city.lower() not in cities:
+        return jsonify({'error': f"Unknown city: {city}"}), 404
+    hours = min(request.args.get('hours', 24, type=float), 24 * 365)
+    bucket = max(request.args.get('bucket', 60, type=int), 1)
     return jsonify({
-        'scraper_ready': scraper.ready.is_set() if scraper else False,
-        'chrome_initialized': scraper.driver is not None if scraper else False
+        'city': city.lower(),
+        'series': scraper.sentiment_history(cities[city.lower()], hours, bucket)
+    })
+
+@app.route('/trends')
+def trends():
+    # Rolling 15m/1h/24h aggregates kept in memory; never calls the LLM
+    window = request.args.get('window', '1h')
+    try:
+        seconds = parse_window(window)
+        if seconds <= 0:
+            raise ValueError(window)
+    except ValueError:
+        return jsonify({'error': f"Invalid window: {window}"}), 400
+    points = min(max(request.args.get('points', 60, type=int), 1), 1000)
+    city = request.args.get('city', '')
+    cities = {name.lower(): name for name in scraper.news_urls.keys()}
+    if city and city.lower() not in cities:
+        return jsonify({'error': f"Unknown city: {city}"}), 404
+    selected = [cities[city.lower()]] if city else list(cities.values())
+    return jsonify({
+        'window': window,
+        'cities': [dict(name=name.lower(), **scraper.sentiment_trends(name, seconds, points))
+                   for name in selected]
     })
 
 @app.route('/news-stream')
 def news_stream():
+    # Frames are pushed by the fetcher when a new snapshot is published;
+    # an idle connection only gets periodic keep-alive comments.
+    subscription = scraper.broadcaster.subscribe(request.headers.get('Last-Event-ID'))
+
     def event_stream():
-        while True:
-            try:
-                if not scraper or not scraper.ready.wait(timeout=10):
-                    yield 'data: {"error": "Scraper initialization timed out"}\n\n'
-                    continue
-                
-                news_data = {
-                    'news': [{
-                        'name': city,
-                        'items': scraper.get_news_items(city),
-                        'analysis': scraper.analyze_news_trends(city)
-                    } for city in scraper.news_urls.keys()]
-                }
-                yield f'data: {json.dumps(news_data)}\n\n'
-                time.sleep(2)  # Check for updates every 2 seconds
-            except Exception as e:
-                yield f'data: {{"error": "{str(e)}"}}\n\n'
-                time.sleep(5)
-
-    return Response(event_stream(), mimetype="text/event-stream")
+        try:
+            while True:
+                frame = subscription.next_frame()
+                yield frame if frame is not None else b': keep-alive\n\n'
+        finally:
+            scraper.broadcaster.unsubscribe(subscription)
+
+    return Response(event_stream(), mimetype="text/event-stream",
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=False) 
\ No newline at end of file
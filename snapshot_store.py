@@ -0,0 +1,435 @@
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from collections import deque
+
+from instrumentation import METRICS
+
+# SSE fan-out: each subscriber gets at most this many undelivered frames
+# (older ones are dropped, every frame is a full snapshot anyway)
+SSE_QUEUE_SIZE = 4
+SSE_HEARTBEAT = 15  # seconds of silence before a keep-alive comment
+
+# /news-data?since=<version> answers with a delta for clients at most this
+# many versions behind, and with the full snapshot otherwise
+DELTA_HISTORY = int(os.environ.get('NEWS_DELTA_HISTORY', '30'))
+
+# Shared snapshot file written by collector.py and mapped by web workers.
+# Layout: fixed header, then the JSON body, its gzip copy, a JSON document
+# of collector state (status, metrics, trends) and the deltas, each one a
+# (since version, length, gzip length) triple followed by its JSON and the
+# gzip copy. Every write goes to a
+# new file that replaces the old one, so a mapped file never changes.
+SNAPSHOT_FILE = os.environ.get('NEWS_SNAPSHOT_FILE', '')
+SNAPSHOT_MAGIC = b'NEWSSNAP'
+SNAPSHOT_FORMAT = 2
+_HEADER = struct.Struct('<8sIQd20sQQQQ')  # magic, format, version, created_at, etag, 4 lengths
+_DELTA_ENTRY = struct.Struct('<QQQ')
+SNAPSHOT_CHECK_INTERVAL = 0.1  # seconds between stat() calls on the hot path
+SNAPSHOT_WATCH_INTERVAL = 0.25  # seconds between checks by the SSE watcher
+TREND_POINTS = 120  # series points per trend window shared by the collector
+
+
+class NewsSnapshot:
+    """Immutable, pre-encoded view of all cities published once per refresh"""
+    __slots__ = ('version', 'created_at', 'body', 'gzip_body', 'etag', 'city_hashes', 'deltas')
+
+    def __init__(self, version, created_at, body, city_hashes, deltas=None):
+        self.version = version
+        self.created_at = created_at
+        self.body = body  # UTF-8 JSON bytes
+        self.gzip_body = gzip.compress(body, compresslevel=6)
+        # Strong validator derived from content, stable across restarts
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        self.city_hashes = city_hashes  # city -> (content hash, updated)
+        # older version -> (JSON bytes, gzip bytes) of the changes since it
+        self.deltas = {since: (delta, gzip.compress(delta, compresslevel=6))
+                       for since, delta in (deltas or {}).items()}
+
+
+def news_data_response(snapshot, since=None, version=None, if_none_match='',
+                       accept_encoding=''):
+    """(status, body, headers) answering /news-data from a snapshot.
+
+    Shared by server.py and asgi_app.py; takes the raw query values and
+    request headers. Answers 304 when the client's ETag or version
+    (`version` or `since`) is current, the delta from `since` when one is
+    kept (see SnapshotDeltas), and the full snapshot otherwise; gzip
+    when the client accepts it.
+    """
+    etag = f'"{snapshot.etag}"'
+    headers = [('ETag', etag), ('Vary', 'Accept-Encoding'), ('Cache-Control', 'no-cache')]
+    client_etags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    if (etag in client_etags or '*' in client_etags
+            or str(snapshot.version) in (version, since)):
+        return 304, b'', headers
+    since = int(since) if since and since.isdigit() else None
+    body, gzip_body = snapshot.deltas.get(since, (snapshot.body, snapshot.gzip_body))
+    headers.append(('Content-Type', 'application/json'))
+    for coding in accept_encoding.split(','):
+        name, _, params = coding.partition(';')
+        if name.strip() == 'gzip' and params.replace(' ', '') not in ('q=0', 'q=0.0'):
+            headers.append(('Content-Encoding', 'gzip'))
+            return 200, gzip_body, headers
+    return 200, body, headers
+
+
+class SnapshotDeltas:
+    """Item sequence ids and the deltas between recent snapshots.
+
+    Every distinct item of a city gets an id from one increasing counter;
+    an item that changes (e.g. gains its score) is a new item with a new
+    id. Each published snapshot is compared with the last DELTA_HISTORY
+    ones. Per changed city a delta lists the removed ids and the added
+    items with their positions, or all items when the survivors were
+    reordered. Unchanged cities are left out. Deltas are keyed by version
+    and versions are unique across restarts, so a `since` from another
+    process never matches and gets the full snapshot.
+    """
+    def __init__(self, history=DELTA_HISTORY):
+        self._ids = {}  # city -> {item: id}
+        self._next_id = 1
+        self._states = deque(maxlen=history)  # (version, {city: (ids, entry)})
+
+    def item_ids(self, city, items):
+        """Ids for a city's items, reusing the ids of items already published"""
+        known = self._ids.get(city, {})
+        current = {}
+        ids = []
+        for item in items:
+            item_id = known.get(item)
+            if item_id is None or item in current:
+                item_id = self._next_id
+                self._next_id += 1
+            current[item] = item_id
+            ids.append(item_id)
+        self._ids[city] = current
+        return tuple(ids)
+
+    def encode(self, version, created_at, cities):
+        """Deltas to `version` from every retained older version, then retain it.
+
+        `cities` maps city -> (ids, entry, items), where entry holds the
+        city's name, analysis, score and updated time.
+        """
+        state = {city: (ids, entry) for city, (ids, entry, _) in cities.items()}
+        deltas = {}
+        for since, old_state in self._states:
+            changes = []
+            for city, (ids, entry, items) in cities.items():
+                old = old_state.get(city)
+                if old == (ids, entry):
+                    continue
+                changes.append(self._city_delta(old[0] if old else None, ids, entry, items))
+            deltas[since] = json.dumps({'version': version, 'since': since, 'updated': created_at,
+                                        'news': changes}, separators=(',', ':')).encode('utf-8')
+        self._states.append((version, state))
+        return deltas
+
+    @staticmethod
+    def _city_delta(old_ids, ids, entry, items):
+        change = dict(entry)
+        if old_ids is not None:
+            old = set(old_ids)
+            current = set(ids)
+            kept = [item_id for item_id in old_ids if item_id in current]
+            # Positional inserts only rebuild the list if survivors kept their order
+            if kept == [item_id for item_id in ids if item_id in old]:
+                change['removed'] = [item_id for item_id in old_ids if item_id not in current]
+                change['added'] = [[index, dict(id=item_id, **item.to_json())]
+                                   for index, (item_id, item) in enumerate(zip(ids, items))
+                                   if item_id not in old]
+                return change
+        change['items'] = [dict(id=item_id, **item.to_json()) for item_id, item in zip(ids, items)]
+        return change
+
+
+class SnapshotSubscription:
+    """One SSE client's bounded queue of pre-encoded frames"""
+    def __init__(self, maxsize=SSE_QUEUE_SIZE):
+        self.frames = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, frame):
+        """Queue a frame without blocking, discarding the oldest if full"""
+        while True:
+            try:
+                self.frames.put_nowait(frame)
+                return
+            except queue.Full:
+                try:
+                    self.frames.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def next_frame(self, timeout=SSE_HEARTBEAT):
+        """Next frame, or None after `timeout` seconds of silence"""
+        try:
+            return self.frames.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class SnapshotBroadcaster:
+    """Publish/subscribe fan-out of snapshots to SSE clients.
+
+    Each snapshot is encoded as an SSE frame once and handed to every
+    subscriber, so upstream work does not grow with the number of clients.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self.last_frame = None
+        self.last_version = 0
+        self.published = 0
+
+    def subscribe(self, last_event_id=None):
+        subscription = SnapshotSubscription()
+        with self._lock:
+            self._subscribers.add(subscription)
+            # Catch the new client up unless it already has this version
+            if self.last_frame is not None and last_event_id != str(self.last_version):
+                subscription.offer(self.last_frame)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, snapshot):
+        frame = b'id: %d\ndata: ' % snapshot.version + snapshot.body + b'\n\n'
+        with self._lock:
+            self.last_frame = frame
+            self.last_version = snapshot.version
+            self.published += 1
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.offer(frame)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'published': self.published,
+                'dropped': sum(s.dropped for s in self._subscribers)
+            }
+
+
+class SnapshotWriter:
+    """Publishes snapshots plus collector state to the shared snapshot file"""
+    def __init__(self, path=SNAPSHOT_FILE):
+        self.path = path
+        self.writes = 0
+
+    def write(self, snapshot, state):
+        extras = json.dumps(state, separators=(',', ':')).encode('utf-8')
+        deltas = b''.join(_DELTA_ENTRY.pack(since, len(delta), len(gzip_delta)) + delta + gzip_delta
+                          for since, (delta, gzip_delta) in snapshot.deltas.items())
+        header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT, snapshot.version,
+                              snapshot.created_at, snapshot.etag.encode('ascii'),
+                              len(snapshot.body), len(snapshot.gzip_body), len(extras),
+                              len(deltas))
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(header)
+            f.write(snapshot.body)
+            f.write(snapshot.gzip_body)
+            f.write(extras)
+            f.write(deltas)
+        # Atomic swap: readers see the old file or the new one, never a mix
+        os.replace(temp_path, self.path)
+        self.writes += 1
+
+
+class MappedSnapshot:
+    """A snapshot read back from the shared file; the JSON body is never parsed"""
+    __slots__ = ('version', 'created_at', 'body', 'gzip_body', 'etag', 'state', 'deltas')
+
+    def __init__(self, version, created_at, body, gzip_body, etag, state, deltas):
+        self.version = version
+        self.created_at = created_at
+        self.body = body
+        self.gzip_body = gzip_body
+        self.etag = etag
+        self.state = state  # Collector status, metrics and trends
+        self.deltas = deltas
+
+
+def read_snapshot_file(path):
+    """MappedSnapshot from a snapshot file, None if it is missing or not one"""
+    try:
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if len(mapped) < _HEADER.size:
+                    return None
+                (magic, file_format, version, created_at, etag, body_length,
+                 gzip_length, extras_length, deltas_length) = _HEADER.unpack_from(mapped)
+                if magic != SNAPSHOT_MAGIC or file_format != SNAPSHOT_FORMAT:
+                    return None
+                start = _HEADER.size
+                body = mapped[start:start + body_length]
+                start += body_length
+                gzip_body = mapped[start:start + gzip_length]
+                start += gzip_length
+                state = json.loads(mapped[start:start + extras_length])
+                start += extras_length
+                deltas = {}
+                end = start + deltas_length
+                while start < end:
+                    since, length, gzip_length = _DELTA_ENTRY.unpack_from(mapped, start)
+                    start += _DELTA_ENTRY.size
+                    deltas[since] = (mapped[start:start + length],
+                                     mapped[start + length:start + length + gzip_length])
+                    start += length + gzip_length
+    except (OSError, ValueError, struct.error):
+        return None
+    return MappedSnapshot(version, created_at, body, gzip_body, etag.decode('ascii'), state,
+                          deltas)
+
+
+class SnapshotReader:
+    """Latest snapshot in the shared file, re-read only when the file is replaced"""
+    def __init__(self, path=SNAPSHOT_FILE, check_interval=SNAPSHOT_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self.snapshot = None
+        self.reloads = 0
+        self._identity = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def current(self):
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return self.snapshot
+        with self._lock:
+            self._checked = now
+            try:
+                info = os.stat(self.path)
+            except OSError:
+                return self.snapshot
+            identity = (info.st_ino, info.st_mtime_ns, info.st_size)
+            if identity != self._identity:
+                snapshot = read_snapshot_file(self.path)
+                if snapshot is not None:
+                    self._identity = identity
+                    self.snapshot = snapshot
+                    self.reloads += 1
+            return self.snapshot
+
+
+def _rebucket(series, begin, seconds, points):
+    """Average (time, score, count) points into `points` buckets over [begin, begin + seconds)"""
+    width = seconds / points
+    counts, sums = {}, {}
+    for point in series:
+        if point['time'] < begin:
+            continue
+        index = min(int((point['time'] - begin) // width), points - 1)
+        counts[index] = counts.get(index, 0) + point['count']
+        sums[index] = sums.get(index, 0.0) + point['score'] * point['count']
+    return [{'time': round(begin + (index + 0.5) * width, 1),
+             'score': round(sums[index] / counts[index], 3),
+             'count': counts[index]} for index in sorted(counts)]
+
+
+class SnapshotConsumer:
+    """Read-only stand-in for NewsScraperApp in web workers (see collector.py).
+
+    Serves what the collector process last wrote to the shared snapshot
+    file. It never fetches feeds or calls the LLM. A watcher thread
+    forwards new versions to this worker's SSE subscribers.
+    """
+    def __init__(self, path=SNAPSHOT_FILE):
+        self.reader = SnapshotReader(path)
+        self.ready = threading.Event()
+        self.driver = None
+        self.broadcaster = SnapshotBroadcaster()
+        self._history = None
+        self._history_lock = threading.Lock()
+        threading.Thread(target=self._watch, daemon=True, name='snapshot-watch').start()
+
+    def _watch(self):
+        published = 0
+        while True:
+            snapshot = self.reader.current()
+            if snapshot is not None:
+                self.ready.set()
+                if snapshot.version != published:
+                    published = snapshot.version
+                    self.broadcaster.publish(snapshot)
+            time.sleep(SNAPSHOT_WATCH_INTERVAL)
+
+    @property
+    def snapshot(self):
+        return self.reader.current()
+
+    @property
+    def state(self):
+        snapshot = self.reader.current()
+        return snapshot.state if snapshot is not None else {}
+
+    @property
+    def news_urls(self):
+        return {city: None for city in self.state.get('cities', [])}
+
+    def status(self):
+        state = self.state
+        snapshot = self.reader.current()
+        return dict(state.get('status', {}),
+                    scraper_ready=self.ready.is_set(),
+                    snapshot_version=snapshot.version if snapshot else 0,
+                    stream=self.broadcaster.stats(),
+                    collector={'pid': state.get('pid'),
+                               'age': round(time.time() - state['time'], 1)
+                               if 'time' in state else None,
+                               'reloads': self.reader.reloads})
+
+    def render_metrics(self):
+        """This worker's metrics plus the collector's, as Prometheus text"""
+        metrics = self.state.get('metrics', {})
+        stream = self.broadcaster.stats()
+        # SSE clients are per worker; the collector has none of its own
+        collected = [entry for entry in metrics.get('collected', [])
+                     if entry[0] not in ('sse_clients', 'sse_dropped_frames')]
+        collected += [
+            ('sse_clients', 'gauge', "Connected /news-stream clients",
+             [({'pid': os.getpid()}, stream['subscribers'])]),
+            ('sse_dropped_frames', 'gauge', "Frames dropped for slow SSE clients",
+             [({'pid': os.getpid()}, stream['dropped'])]),
+        ]
+        return METRICS.render(collected) + metrics.get('registry', '')
+
+    def sentiment_trends(self, city, window, points=60):
+        """Trends from the collector's precomputed series of the nearest configured window"""
+        trends = self.state.get('trends', {}).get(city)
+        if not trends:
+            return {'windows': {}, 'series': []}
+        computed = sorted((float(seconds), series) for seconds, series in trends['series'].items())
+        series = next((series for seconds, series in computed if seconds >= window),
+                      computed[-1][1])
+        return {
+            'windows': trends['windows'],
+            'series': _rebucket(series, self.state['time'] - window, window, points)
+        }
+
+    def sentiment_history(self, city, hours=24, bucket_minutes=60):
+        """Stored sentiment per time bucket, read from the collector's history database"""
+        path = self.state.get('history_db')
+        if not path:
+            return []
+        with self._history_lock:
+            if self._history is None:
+                from history_store import HistoryStore
+                self._history = HistoryStore(path)
+        since = time.time() - hours * 60 * 60
+        return [{'time': bucket, 'score': round(score, 3), 'count': count}
+                for bucket, score, count in
+                self._history.sentiment_trend(city, since, bucket_minutes * 60)]
@@ -1,8 +1,28 @@
-let lastVersions = {};
+// Version/ETag of the last snapshot applied; the server answers 304 while
+// they are current, so unchanged polls never touch the DOM. Otherwise it
+// sends the changes since lastVersion, or everything if that is too old.
+let lastVersion = 0;
+let lastEtag = null;
 
-function createNewsElement(item) {
+// Items shown per city in display order, kept in step with the deltas
+const cityItems = {};
+const cityOrder = [];
+
+// A story already listed under an earlier city (same cluster id) is
+// collapsed to its headline with a pointer to that city.
+function createNewsElement(item, firstCity) {
     const div = document.createElement('div');
     div.className = 'news-item';
+    div.dataset.id = item.id;
+    if(item.cluster !== undefined) div.dataset.cluster = item.cluster;
+    if(firstCity) {
+        div.classList.add('repeat');
+        div.innerHTML = `
+        <h3>${item.headline}</h3>
+        <p>${item.source} • Also in ${firstCity}</p>
+    `;
+        return div;
+    }
     div.innerHTML = `
         <h3>${item.headline}</h3>
         <p>${item.source} • ${item.timestamp}</p>
@@ -12,12 +32,57 @@ function createNewsElement(item) {
     return div;
 }
 
+// First city (in page order) listing each story cluster
+function firstCities() {
+    const first = {};
+    cityOrder.forEach(name => (cityItems[name] || []).forEach(item => {
+        if(item.cluster !== undefined && !(item.cluster in first)) first[item.cluster] = name;
+    }));
+    return first;
+}
+
+function newsElementFor(item, cityName, first) {
+    const firstCity = first[item.cluster];
+    return createNewsElement(item, firstCity !== cityName ? firstCity : undefined);
+}
+
 async function updateNews() {
     try {
-        const res = await fetch('/news-data');
-        const {news, error} = await res.json();
+        const res = await fetch(`/news-data?since=${lastVersion}`, {
+            cache: 'no-store',
+            headers: lastEtag ? {'If-None-Match': lastEtag} : {}
+        });
+        if(res.status === 304) {
+            setTimeout(updateNews, 1000);
+            return;
+        }
+        const {news, version, since, error} = await res.json();
         
         if(error) throw new Error(error);
+        if(since !== undefined && since !== lastVersion) {
+            // Not a patch for what is shown: start over from a full snapshot
+            lastVersion = 0;
+            lastEtag = null;
+            setTimeout(updateNews, 0);
+            return;
+        }
+        lastVersion = version;
+        lastEtag = res.headers.get('ETag');
+        if(since === undefined) cityOrder.splice(0, cityOrder.length, ...news.map(c => c.name));
+
+        // Update the item lists first; collapsing repeats looks at every city
+        const previousFirst = firstCities();
+        news.forEach(cityData => {
+            if(cityData.items) {
+                cityItems[cityData.name] = cityData.items;
+                return;
+            }
+            const removed = new Set(cityData.removed);
+            const items = (cityItems[cityData.name] || []).filter(item => !removed.has(item.id));
+            cityData.added.forEach(([index, item]) => items.splice(index, 0, item));
+            cityItems[cityData.name] = items;
+        });
+        const first = firstCities();
         
         news.forEach(cityData => {
             const container = document.getElementById(`${cityData.name}-news`);
@@ -25,14 +90,25 @@ async function updateNews() {
 
             // News items
             const itemsContainer = container.querySelector('.news-items');
-            const currentItems = Array.from(itemsContainer.children);
-            
-            // Clear only if server has newer data
-            if(Number(itemsContainer.dataset.version || 0) < cityData.updated) {
-                itemsContainer.innerHTML = '';
+            if(!cityData.items) {
+                // Delta: only removed and added items touch the DOM
+                cityData.removed.forEach(id => {
+                    const node = itemsContainer.querySelector(`[data-id="${id}"]`);
+                    if(node) node.remove();
+                });
+                cityData.added.forEach(([index, item]) => {
+                    itemsContainer.insertBefore(newsElementFor(item, cityData.name, first),
+                                                itemsContainer.children[index] || null);
+                });
+                itemsContainer.dataset.version = cityData.updated;
+            } else {
+                // Full list (first load, or the client fell behind or the
+                // server restarted): item ids may all be new, so rebuild
+                const fragment = document.createDocumentFragment();
                 cityData.items.forEach(item => {
-                    itemsContainer.appendChild(createNewsElement(item));
+                    fragment.appendChild(newsElementFor(item, cityData.name, first));
                 });
+                itemsContainer.replaceChildren(fragment);
                 itemsContainer.dataset.version = cityData.updated;
             }
 
@@ -42,11 +118,26 @@ async function updateNews() {
                 analysisContainer.innerHTML = cityData.analysis || 'Analysis pending...';
                 analysisContainer.dataset.version = cityData.updated;
                 // Add sentiment color
-                const sentimentColor = getSentimentColor(cityData.analysis);
+                const sentimentColor = getSentimentColor(cityData.analysis, cityData.score);
                 container.querySelector('.sentiment-indicator').style.backgroundColor = sentimentColor;
             }
         });
-        
+
+        // A story whose first city changed is redrawn everywhere it is listed,
+        // also in cities the update left out: the new first city shows it in
+        // full, the others as a repeat pointing there
+        const moved = new Set(Object.keys(first).filter(cluster => first[cluster] !== previousFirst[cluster]));
+        if(moved.size) cityOrder.forEach(name => {
+            const container = document.getElementById(`${name}-news`);
+            if(!container) return;
+            const itemsContainer = container.querySelector('.news-items');
+            (cityItems[name] || []).forEach(item => {
+                if(item.cluster === undefined || !moved.has(String(item.cluster))) return;
+                const node = itemsContainer.querySelector(`[data-id="${item.id}"]`);
+                if(node) node.replaceWith(newsElementFor(item, name, first));
+            });
+        });
+
     } catch(e) {
         console.error('Update error:', e);
     }
@@ -56,15 +147,22 @@ async function updateNews() {
 // Initial call
 updateNews();
 
-// Remove old polling code and keep only the sentiment color function
-function getSentimentColor(analysis) {
+// Colour from the server's aggregated 1-5 score, falling back to the label text
+function getSentimentColor(analysis, score) {
+    if (typeof score === 'number') {
+        if (score >= 3.5) return '#4CAF50';  // Green
+        if (score <= 2.5) return '#F44336';  // Red
+        return '#FFC107';  // Amber
+    }
+
     const positiveWords = ['positive', 'optimistic', 'bullish', 'favorable'];
     const negativeWords = ['negative', 'pessimistic', 'bearish', 'unfavorable'];
+    const text = (analysis || '').toLowerCase();
     
-    const score = positiveWords.filter(w => analysis.toLowerCase().includes(w)).length -
-                  negativeWords.filter(w => analysis.toLowerCase().includes(w)).length;
+    const balance = positiveWords.filter(w => text.includes(w)).length -
+                    negativeWords.filter(w => text.includes(w)).length;
 
-    if (score > 0) return '#4CAF50';  // Green
-    if (score < 0) return '#F44336';  // Red
+    if (balance > 0) return '#4CAF50';  // Green
+    if (balance < 0) return '#F44336';  // Red
     return '#FFC107';  // Amber
-} 
\ No newline at end of file
+}
\ No newline at end of file
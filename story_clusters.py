@@ -0,0 +1,124 @@
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+# MinHash/LSH settings: 64 hashes in 16 bands of 4 make pairs above a
+# Jaccard similarity of about 0.5 likely candidates; candidates are then
+# checked against NEWS_CLUSTER_THRESHOLD on the full signature.
+NUM_HASHES = 64
+LSH_BANDS = 16
+CLUSTER_THRESHOLD = float(os.environ.get('NEWS_CLUSTER_THRESHOLD', '0.7'))
+MAX_CLUSTERS = 50000  # oldest clusters are forgotten beyond this
+
+_SOURCE_SUFFIX = re.compile(r'\s+[-|–—]\s+[^-|–—]{1,60}$')  # 'Headline - Source'
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def shingles(headline):
+    """Word bigrams (single words for very short titles) of a normalized headline"""
+    words = _WORD.findall(_SOURCE_SUFFIX.sub('', headline).lower())
+    if len(words) < 3:
+        return set(words)
+    return {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+class StoryClusterIndex:
+    """Assigns near-identical headlines, across cities and cycles, to one cluster id.
+
+    Each headline gets a MinHash signature of its word-bigram shingles
+    (multiply-shift hashes of CRC32 values, vectorized with NumPy). LSH
+    band buckets give candidate clusters in constant time per headline.
+    A candidate is accepted when its estimated Jaccard similarity reaches
+    CLUSTER_THRESHOLD. Clusters are kept in LRU order up to MAX_CLUSTERS.
+    NumPy is imported, and the hash functions drawn, on first use.
+    """
+    def __init__(self, num_hashes=NUM_HASHES, bands=LSH_BANDS,
+                 threshold=CLUSTER_THRESHOLD, max_clusters=MAX_CLUSTERS, seed=1):
+        self.num_hashes = num_hashes
+        self.seed = seed
+        self._hash_params = None  # (a, b) arrays, drawn by the first signatures() call
+        self.bands = bands
+        self.rows = num_hashes // bands
+        self.threshold = threshold
+        self.max_clusters = max_clusters
+        self._clusters = OrderedDict()  # id -> (signature, band keys)
+        self._buckets = {}  # band key -> cluster id
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self.assigned = 0
+        self.merged = 0
+
+    def signatures(self, headlines):
+        """MinHash signature per headline (None when it has no words), in one NumPy pass"""
+        import numpy as np
+
+        if self._hash_params is None:
+            rng = np.random.default_rng(self.seed)
+            # Odd multipliers for multiply-shift hashing; uint64 products wrap
+            self._hash_params = (
+                rng.integers(1, 2 ** 63, self.num_hashes, dtype=np.uint64) | np.uint64(1),
+                rng.integers(0, 2 ** 63, self.num_hashes, dtype=np.uint64))
+        a, b = self._hash_params
+        shingle_sets = [shingles(headline) for headline in headlines]
+        starts, hashes = [], []
+        for tokens in shingle_sets:
+            if tokens:
+                starts.append(len(hashes))
+                hashes.extend(zlib.crc32(token.encode('utf-8')) for token in tokens)
+        if not hashes:
+            return [None] * len(headlines)
+        values = np.array(hashes, dtype=np.uint64)[:, None]
+        permuted = ((values * a + b) >> np.uint64(32)) & np.uint64(0xFFFFFFFF)
+        minimums = iter(np.minimum.reduceat(permuted, starts, axis=0).astype(np.uint32))
+        return [next(minimums) if tokens else None for tokens in shingle_sets]
+
+    def _band_keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                for band in range(self.bands)]
+
+    def assign(self, headlines):
+        """Cluster id for each headline, creating clusters as needed"""
+        signatures = self.signatures(headlines)
+        ids = []
+        with self._lock:
+            for signature in signatures:
+                ids.append(None if signature is None else self._assign(signature))
+        return ids
+
+    def _assign(self, signature):
+        keys = self._band_keys(signature)
+        best, best_similarity = None, self.threshold
+        for key in keys:
+            cluster_id = self._buckets.get(key)
+            if cluster_id is None or cluster_id == best:
+                continue
+            similarity = float((self._clusters[cluster_id][0] == signature).mean())
+            if similarity >= best_similarity:
+                best, best_similarity = cluster_id, similarity
+        self.assigned += 1
+        if best is not None:
+            self.merged += 1
+            self._clusters.move_to_end(best)
+            return best
+
+        cluster_id = self._next_id
+        self._next_id += 1
+        self._clusters[cluster_id] = (signature, keys)
+        for key in keys:
+            self._buckets.setdefault(key, cluster_id)
+        while len(self._clusters) > self.max_clusters:
+            old_id, (_, old_keys) = self._clusters.popitem(last=False)
+            for key in old_keys:
+                if self._buckets.get(key) == old_id:
+                    del self._buckets[key]
+        return cluster_id
+
+    def stats(self):
+        with self._lock:
+            return {
+                'clusters': len(self._clusters),
+                'assigned': self.assigned,
+                'merged': self.merged
+            }
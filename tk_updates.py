@@ -0,0 +1,146 @@
+import os
+import queue
+import time
+import tkinter as tk
+import types
+from collections import OrderedDict
+
+# Main-loop time spent on queued UI work per frame, and the polling delay
+# while the queue is empty (milliseconds)
+FRAME_BUDGET_MS = float(os.environ.get('NEWS_UI_FRAME_MS', '8'))
+IDLE_INTERVAL_MS = 50
+
+_DONE = object()
+_END = "end-1c"  # Before the newline a Text widget always ends with
+
+
+class TkUpdateQueue:
+    """Hands UI work from worker threads to the Tk main loop.
+
+    Worker threads call `post(key, job)`; only the main loop touches
+    widgets. Jobs with the same key are coalesced, so the newest one wins.
+    A job may return a generator, which is then resumed step by step. The
+    loop runs jobs and steps for at most `frame_budget_ms` per `after`
+    callback, so long renders are spread over frames and input events are
+    handled in between.
+    """
+    def __init__(self, root, frame_budget_ms=FRAME_BUDGET_MS):
+        self.root = root
+        self.frame_budget = frame_budget_ms / 1000
+        self._queue = queue.SimpleQueue()
+        self._pending = OrderedDict()  # key -> job not started yet
+        self._active = OrderedDict()  # key -> generator of a running job
+        self.root.after(0, self._drain)
+
+    def post(self, key, job):
+        """Queue `job()` for the main loop; safe to call from any thread"""
+        self._queue.put((key, job))
+
+    def _drain(self):
+        deadline = time.perf_counter() + self.frame_budget
+        while True:
+            try:
+                key, job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._pending.pop(key, None)
+            self._pending[key] = job
+        try:
+            self._run(deadline)
+        finally:
+            busy = self._pending or self._active
+            self.root.after(1 if busy else IDLE_INTERVAL_MS, self._drain)
+
+    def _run(self, deadline):
+        while (self._pending or self._active) and time.perf_counter() < deadline:
+            # A key waits until its running job has finished
+            for key in [key for key in self._pending if key not in self._active]:
+                job = self._pending.pop(key)
+                steps = self._call(job)
+                if isinstance(steps, types.GeneratorType):
+                    self._active[key] = steps
+            for key, steps in list(self._active.items()):
+                if self._call(next, steps, _DONE) is _DONE:
+                    del self._active[key]
+                if time.perf_counter() >= deadline:
+                    break
+
+    def _call(self, function, *args):
+        try:
+            return function(*args)
+        except Exception as e:
+            print(f"Error updating display: {str(e)}")
+            return _DONE
+
+
+class NewsPane:
+    """Keeps a ScrolledText in sync with a city's items.
+
+    Each displayed item starts at its own text mark, so an update only
+    deletes the items that are gone and inserts the new ones before the
+    next item still shown. Tags are configured once. `render(items)` is a
+    generator that does one item per step (see TkUpdateQueue).
+    """
+    def __init__(self, text):
+        self.text = text
+        self.order = []  # item keys in display order
+        self._marks = {}  # item key -> mark at the start of its block
+        self._next_mark = 0
+        text.tag_configure("number", font=("Arial", 10, "bold"), foreground="#666666")
+        text.tag_configure("headline", font=("Arial", 11, "bold"))
+        text.tag_configure("source", font=("Arial", 9), foreground="#666666")
+        text.tag_configure("subheading", font=("Arial", 10))
+        text.tag_configure("timestamp", font=("Arial", 9, "italic"), foreground="#0066cc")
+        text.tag_configure("separator", foreground="#cccccc")
+
+    @staticmethod
+    def item_key(item):
+        return item.link or item.headline
+
+    def render(self, news_items):
+        """Update the widget to show news_items, yielding after each item"""
+        keys = [self.item_key(item) for item in news_items]
+        wanted = set(keys)
+        survivors = [key for key in self.order if key in wanted]
+        if survivors != [key for key in keys if key in self._marks]:
+            # Items were reordered: start over rather than move blocks
+            self.text.delete("1.0", tk.END)
+            self.text.mark_unset(*self._marks.values())
+            self._marks.clear()
+            self.order = survivors = []
+        kept = set(survivors)
+        for position, key in enumerate(self.order):
+            if key not in kept:
+                following = self.order[position + 1] if position + 1 < len(self.order) else None
+                self.text.delete(self._marks[key],
+                                 self._marks[following] if following else _END)
+                self.text.mark_unset(self._marks.pop(key))
+                yield
+        self.order = survivors
+
+        # Each new item goes just before the next surviving item (or at the end)
+        anchors, anchor = [], _END
+        for key in reversed(keys):
+            anchors.append(anchor)
+            if key in kept:
+                anchor = self._marks[key]
+        anchors.reverse()
+        for item, key, anchor in zip(news_items, keys, anchors):
+            if key not in self._marks:
+                self._insert(item, key, anchor)
+                yield
+        self.order = list(OrderedDict.fromkeys(keys))
+
+    def _insert(self, item, key, anchor):
+        text = self.text
+        start = text.index(anchor)
+        text.insert(anchor, "• ", "number", f"{item.headline}\n", "headline",
+                    f"Source: {item.source}\n", "source",
+                    f"{item.subheading}\n", "subheading",
+                    f"Posted: {item.timestamp}\n", "timestamp",
+                    "─" * 50 + "\n\n", "separator")
+        mark = f"item{self._next_mark}"
+        self._next_mark += 1
+        # Marks have right gravity, so text later inserted here goes before the item
+        text.mark_set(mark, start)
+        self._marks[key] = mark